@@ -0,0 +1 @@
+"""Shared data access and compute helpers for the Streamlit pages."""
@@ -0,0 +1,83 @@
+"""
+On-disk artifacts written by `python -m analytics.precompute`.
+
+Artifacts live in artifacts/<dataset version>/<name>.pkl, so a rewritten data
+file (new version) makes every older artifact stale automatically. Pages use
+an artifact when it exists for the version they show and compute live
+otherwise; a filtered view has a version of its own (analytics.filters), so it
+never has artifacts and is always computed live.
+"""
+
+import os
+import pickle
+import shutil
+import threading
+from pathlib import Path
+
+from analytics.data import ROOT_DIR
+
+ARTIFACTS_DIR = Path(os.getenv("CRIME_ARTIFACTS_DIR", ROOT_DIR / "artifacts"))
+
+
+def artifact_path(name, version):
+    return ARTIFACTS_DIR / version / f"{name}.pkl"
+
+
+def save_artifact(obj, name, version):
+    """Pickle obj atomically (write to a temp file, then rename)."""
+    path = artifact_path(name, version)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Per-thread temp name: sessions may store the same artifact at once
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_artifact(name, version):
+    """The stored artifact for this dataset version, or None if there is none."""
+    try:
+        with open(artifact_path(name, version), "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def load_or_compute(name, version, compute, valid=None):
+    """
+    Precomputed artifact when present, otherwise compute() live. `valid`
+    rejects a stored artifact that no longer fits (e.g. one fitted on another
+    feature set), which is then computed live as well.
+    """
+    artifact = load_artifact(name, version)
+    if artifact is None or (valid is not None and not valid(artifact)):
+        return compute()
+    return artifact
+
+
+def cached_artifact(name, version, compute, valid=None):
+    """
+    load_or_compute that also stores what it computes, for results too slow
+    to redo in every session (e.g. a UMAP embedding).
+    """
+    artifact = load_artifact(name, version)
+    if artifact is None or (valid is not None and not valid(artifact)):
+        artifact = compute()
+        save_artifact(artifact, name, version)
+    return artifact
+
+
+def list_artifacts(version):
+    """Names of the artifacts stored for a dataset version."""
+    return sorted(path.stem for path in (ARTIFACTS_DIR / version).glob("*.pkl"))
+
+
+def prune_artifacts(keep_version):
+    """Delete artifacts of every other dataset version."""
+    if not ARTIFACTS_DIR.exists():
+        return
+    for path in ARTIFACTS_DIR.iterdir():
+        if path.is_dir() and path.name != keep_version:
+            shutil.rmtree(path)
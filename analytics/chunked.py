@@ -0,0 +1,124 @@
+"""
+Chunked, multi-core aggregation of crime CSVs larger than memory.
+
+    python -m analytics.ingest --chunked [--workers 8] [--chunk-mb 64]
+
+The file is split into byte ranges that end on row boundaries; worker
+processes parse one range at a time and return its partial aggregates
+(pipeline.chunk_aggregates: overview counts, grid bins, temporal counts,
+moment sums), which the parent merges as they arrive. Peak memory is about
+workers x chunk size, independent of the file size.
+
+Rows are split on newlines, so quoted fields must not contain line breaks
+(true of the Chicago export).
+"""
+
+import io
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from analytics import pipeline
+from analytics.artifacts import save_artifact
+from analytics.data import DATA_PATH, dataset_version, read_csv
+from analytics.manifest import write_manifest
+
+CHUNK_BYTES = 64 * 2**20
+SAMPLE_ROWS = 10_000
+
+
+# ---------------------------
+# Byte ranges
+# ---------------------------
+def byte_ranges(path, chunk_bytes=CHUNK_BYTES):
+    """
+    Header line and (start, end) offsets covering every data row exactly
+    once; each range ends just after a newline.
+    """
+    with open(path, "rb") as f:
+        header = f.readline()
+        start = f.tell()
+        size = f.seek(0, os.SEEK_END)
+
+        ranges = []
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()  # finish the row the cut landed in
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+def read_range(path, header, start, end, columns=None):
+    """Parse one byte range with read_csv (normalized names, dtypes, dates)."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return read_csv(io.BytesIO(header + data), columns)
+
+
+def _aggregate_range(path, header, start, end, feature_cols):
+    df = read_range(path, header, start, end)
+    return pipeline.chunk_aggregates(df, feature_cols)
+
+
+# ---------------------------
+# Driver
+# ---------------------------
+def aggregate_csv(path=DATA_PATH, chunk_bytes=CHUNK_BYTES, workers=None):
+    """
+    Merged chunk_aggregates() of the whole file, keyed by artifact name.
+
+    At most two ranges per worker are in flight, so finished partials never
+    pile up faster than the parent merges them.
+    """
+    path = str(path)
+    workers = workers or os.cpu_count() or 1
+    header, ranges = byte_ranges(path, chunk_bytes)
+    # Fix the feature set up front so every chunk produces the same columns
+    feature_cols = pipeline.feature_columns(read_csv(path, nrows=SAMPLE_ROWS))
+
+    merged = {}
+    ranges = iter(ranges)
+    pending = set()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+
+        def submit_next():
+            bounds = next(ranges, None)
+            if bounds is not None:
+                pending.add(pool.submit(_aggregate_range, path, header, *bounds, feature_cols))
+
+        for _ in range(2 * workers):
+            submit_next()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            pending.difference_update(done)
+            for future in done:
+                for name, partial in future.result().items():
+                    merged[name] = (
+                        pipeline.merge_aggregate(name, merged[name], partial)
+                        if name in merged else partial
+                    )
+                submit_next()
+
+    return merged
+
+
+def ingest_chunked(path=DATA_PATH, chunk_bytes=CHUNK_BYTES, workers=None):
+    """
+    Write every mergeable artifact (plus the PCA basis derived from the
+    feature statistics) and the dataset manifest for the file's version.
+
+    Returns (version, written paths). Clusters and the balanced map sample
+    need all rows at once and are left to `analytics.precompute`.
+    """
+    version = dataset_version(path)
+    merged = aggregate_csv(path, chunk_bytes, workers)
+
+    written = [save_artifact(value, name, version) for name, value in merged.items()]
+    if "feature_stats" in merged:
+        basis = pipeline.pca_basis_from_stats(merged["feature_stats"])
+        written.append(save_artifact(basis, "pca_basis", version))
+    if "dataset_profile" in merged:
+        written.append(write_manifest(merged["dataset_profile"], path, version))
+    return version, written
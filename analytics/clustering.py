@@ -0,0 +1,241 @@
+"""
+KMeans for the clustering page.
+
+Distances are computed block by block with the ||x||² − 2x·c + ||c||²
+expansion, so memory stays at chunk_size × k instead of n × k × d. Small inputs
+run the original full-batch Lloyd iterations (same seed, same random init, so
+the same labels); large inputs switch to k-means++ seeding and mini-batches.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+CHUNK_SIZE = 65_536
+
+# Above this many rows fit_kmeans switches to mini-batch updates
+MINIBATCH_THRESHOLD = 200_000
+
+
+# ---------------------------
+# Distances (chunked)
+# ---------------------------
+def squared_distances(X, centroids, centroid_sq=None):
+    """Squared euclidean distances from every row of X to every centroid."""
+    if centroid_sq is None:
+        centroid_sq = np.einsum("ij,ij->i", centroids, centroids)
+    row_sq = np.einsum("ij,ij->i", X, X)
+
+    distances = X @ centroids.T
+    distances *= -2.0
+    distances += row_sq[:, None]
+    distances += centroid_sq[None, :]
+    # Cancellation can leave tiny negatives
+    np.maximum(distances, 0.0, out=distances)
+    return distances
+
+
+def _map_chunks(func, n_rows, chunk_size, n_jobs):
+    spans = [
+        (start, min(start + chunk_size, n_rows))
+        for start in range(0, n_rows, chunk_size)
+    ]
+    if n_jobs == 1 or len(spans) == 1:
+        return [func(start, end) for start, end in spans]
+
+    # numpy releases the GIL inside the matrix products, so threads scale
+    workers = os.cpu_count() if n_jobs in (None, -1) else n_jobs
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda span: func(*span), spans))
+
+
+def _assign(X, centroids, chunk_size, n_jobs, with_sums):
+    k, n_features = centroids.shape
+    centroid_sq = np.einsum("ij,ij->i", centroids, centroids)
+
+    def block(start, end):
+        X_block = X[start:end]
+        distances = squared_distances(X_block, centroids, centroid_sq)
+        labels = distances.argmin(axis=1)
+        inertia = distances[np.arange(len(labels)), labels].sum()
+
+        if not with_sums:
+            return labels, inertia, None, None
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros((k, n_features))
+        np.add.at(sums, labels, X_block)
+        return labels, inertia, sums, counts
+
+    parts = _map_chunks(block, len(X), chunk_size, n_jobs)
+
+    labels = np.concatenate([part[0] for part in parts])
+    inertia = float(sum(part[1] for part in parts))
+    if not with_sums:
+        return labels, inertia, None, None
+    sums = sum(part[2] for part in parts)
+    counts = sum(part[3] for part in parts)
+    return labels, inertia, sums, counts
+
+
+def assign_labels(X, centroids, chunk_size=CHUNK_SIZE, n_jobs=1):
+    """Nearest-centroid labels and total inertia (sum of squared distances)."""
+    labels, inertia, _, _ = _assign(
+        np.asarray(X, dtype=float), np.asarray(centroids, dtype=float),
+        chunk_size, n_jobs, with_sums=False
+    )
+    return labels, inertia
+
+
+# ---------------------------
+# Seeding
+# ---------------------------
+def kmeans_plus_plus(X, k, rng):
+    """k-means++ seeding: each new centroid is drawn with probability ∝ D(x)²."""
+    n_rows = len(X)
+    centroids = np.empty((k, X.shape[1]))
+    centroids[0] = X[rng.integers(n_rows)]
+
+    closest_sq = squared_distances(X, centroids[:1])[:, 0]
+    for i in range(1, k):
+        total = closest_sq.sum()
+        if total > 0:
+            index = rng.choice(n_rows, p=closest_sq / total)
+        else:
+            index = rng.integers(n_rows)
+        centroids[i] = X[index]
+        np.minimum(
+            closest_sq, squared_distances(X, centroids[i:i + 1])[:, 0],
+            out=closest_sq
+        )
+    return centroids
+
+
+# ---------------------------
+# Full-batch KMeans
+# ---------------------------
+def kmeans(X, k, max_iters=100, seed=42, init="random",
+           chunk_size=CHUNK_SIZE, n_jobs=1):
+    """
+    Lloyd's KMeans returning (labels, centroids).
+
+    init="random" picks k distinct rows exactly like the original page did
+    (np.random.seed(42) + choice), so labels match the old implementation.
+    """
+    X = np.asarray(X, dtype=float)
+
+    if init == "k-means++":
+        centroids = kmeans_plus_plus(X, k, np.random.default_rng(seed))
+    else:
+        rng = np.random.RandomState(seed)
+        centroids = X[rng.choice(len(X), k, replace=False)]
+
+    for _ in range(max_iters):
+        labels, _, sums, counts = _assign(
+            X, centroids, chunk_size, n_jobs, with_sums=True
+        )
+
+        # Empty clusters keep their previous centroid
+        new_centroids = centroids.copy()
+        filled = counts > 0
+        new_centroids[filled] = sums[filled] / counts[filled, None]
+
+        if np.allclose(centroids, new_centroids):
+            break
+
+        centroids = new_centroids
+
+    return labels, centroids
+
+
+# ---------------------------
+# Mini-batch KMeans
+# ---------------------------
+def minibatch_kmeans(X, k, batch_size=4096, max_iters=300, tol=1e-4, seed=42,
+                     chunk_size=CHUNK_SIZE, n_jobs=1):
+    """
+    Mini-batch KMeans (k-means++ seeded) returning (labels, centroids).
+
+    Stops once the squared centroid shift of a batch drops below
+    tol × mean feature variance, then labels every row in one chunked pass.
+    """
+    X = np.asarray(X, dtype=float)
+    n_rows = len(X)
+    rng = np.random.default_rng(seed)
+
+    centroids = kmeans_plus_plus(X, k, rng)
+    seen = np.zeros(k)
+
+    threshold = None
+    for _ in range(max_iters):
+        batch = X[rng.integers(0, n_rows, min(batch_size, n_rows))]
+        if threshold is None:
+            threshold = tol * batch.var(axis=0).mean()
+
+        labels = squared_distances(batch, centroids).argmin(axis=1)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, batch)
+
+        # Per-centroid learning rate 1 / (points seen so far)
+        seen += counts
+        filled = counts > 0
+        step = (counts[filled] / seen[filled])[:, None]
+        batch_means = sums[filled] / counts[filled, None]
+
+        new_centroids = centroids.copy()
+        new_centroids[filled] += step * (batch_means - centroids[filled])
+
+        shift = ((new_centroids - centroids) ** 2).sum()
+        centroids = new_centroids
+        if shift <= threshold:
+            break
+
+    labels, _ = assign_labels(X, centroids, chunk_size, n_jobs)
+    return labels, centroids
+
+
+def fit_kmeans(X, k, seed=42, n_jobs=1):
+    """Full-batch KMeans for small inputs, mini-batch above MINIBATCH_THRESHOLD."""
+    if len(X) > MINIBATCH_THRESHOLD:
+        return minibatch_kmeans(X, k, seed=seed, n_jobs=n_jobs)
+    return kmeans(X, k, seed=seed, n_jobs=n_jobs)
+
+
+# ---------------------------
+# Diagnostics
+# ---------------------------
+SILHOUETTE_SAMPLE = 2000
+
+
+def silhouette_score(X, labels, sample_size=SILHOUETTE_SAMPLE, seed=42):
+    """
+    Mean silhouette coefficient, on a random sample of sample_size rows
+    (all rows when there are fewer). Rows alone in their cluster score 0.
+    """
+    X = np.asarray(X, dtype=float)
+    labels = np.asarray(labels)
+    if sample_size is not None and len(X) > sample_size:
+        index = np.random.default_rng(seed).choice(len(X), sample_size, replace=False)
+        X, labels = X[index], labels[index]
+
+    clusters, codes = np.unique(labels, return_inverse=True)
+    if len(clusters) < 2:
+        return 0.0
+
+    distances = np.sqrt(squared_distances(X, X))
+    one_hot = np.eye(len(clusters))[codes]
+    sizes = one_hot.sum(axis=0)
+    # Mean distance from every row to every cluster
+    totals = distances @ one_hot
+
+    rows = np.arange(len(X))
+    own_size = sizes[codes]
+    a = totals[rows, codes] / np.maximum(own_size - 1, 1)
+    means = totals / sizes
+    means[rows, codes] = np.inf
+    b = means.min(axis=1)
+
+    scores = (b - a) / np.maximum(a, b)
+    scores[own_size == 1] = 0.0
+    return float(np.nan_to_num(scores).mean())
@@ -0,0 +1,93 @@
+"""
+Contingency tables (group × crime type counts) from integer codes.
+
+Both sides are factorized to integer codes and counted with a single
+bincount into a dense matrix. Everything a page shows afterwards (the full
+table, one group's crime types, distinct types per group) is a slice of
+that matrix, never another filter or groupby over the rows.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _codes(values):
+    # Sorted labels and codes (-1 for missing); plain labels for categoricals
+    codes, labels = pd.factorize(values, sort=True)
+    if isinstance(labels.dtype, pd.CategoricalDtype):
+        labels = labels.astype(labels.dtype.categories.dtype)
+    return codes, pd.Index(labels)
+
+
+class Crosstab:
+    """Dense counts of row groups (e.g. clusters) × column categories (crime types)."""
+
+    def __init__(self, counts, row_labels, col_labels):
+        self.counts = counts
+        self.row_labels = row_labels
+        self.col_labels = col_labels
+
+    @classmethod
+    def from_codes(cls, row_codes, col_codes, row_labels, col_labels):
+        """Count code pairs; pairs with a negative (missing) code are skipped."""
+        row_codes = np.asarray(row_codes, dtype=np.int64)
+        col_codes = np.asarray(col_codes, dtype=np.int64)
+        n_rows, n_cols = len(row_labels), len(col_labels)
+
+        valid = (row_codes >= 0) & (col_codes >= 0)
+        flat = row_codes[valid] * n_cols + col_codes[valid]
+        counts = np.bincount(flat, minlength=n_rows * n_cols).reshape(n_rows, n_cols)
+        return cls(counts, row_labels, col_labels)
+
+    @classmethod
+    def from_arrays(cls, rows, columns, row_name=None, col_name=None):
+        row_codes, row_labels = _codes(rows)
+        col_codes, col_labels = _codes(columns)
+        return cls.from_codes(
+            row_codes, col_codes,
+            row_labels.rename(row_name), col_labels.rename(col_name),
+        )
+
+    def merge(self, other):
+        """Table over the rows of both (e.g. history + appended delta)."""
+        row_labels = self.row_labels.union(other.row_labels)
+        col_labels = self.col_labels.union(other.col_labels)
+        counts = np.zeros((len(row_labels), len(col_labels)), dtype=np.int64)
+
+        for table in (self, other):
+            rows = row_labels.get_indexer(table.row_labels)
+            cols = col_labels.get_indexer(table.col_labels)
+            counts[np.ix_(rows, cols)] += table.counts
+        return Crosstab(
+            counts,
+            row_labels.rename(self.row_labels.name),
+            col_labels.rename(self.col_labels.name),
+        )
+
+    # ---------------------------
+    # Slices
+    # ---------------------------
+    def to_frame(self):
+        """The full table (like pivot_table(..., aggfunc="size", fill_value=0))."""
+        return pd.DataFrame(self.counts, index=self.row_labels, columns=self.col_labels)
+
+    def row(self, label):
+        """Column counts of one row group, most frequent first, zeros dropped."""
+        return self._slice(self.counts[self.row_labels.get_loc(label)], self.col_labels)
+
+    def column(self, label):
+        """Row-group counts of one column category, most frequent first, zeros dropped."""
+        return self._slice(self.counts[:, self.col_labels.get_loc(label)], self.row_labels)
+
+    @staticmethod
+    def _slice(counts, labels):
+        order = np.argsort(-counts, kind="stable")
+        order = order[counts[order] > 0]
+        return pd.Series(counts[order], index=labels.take(order), name="count")
+
+    def row_totals(self):
+        return pd.Series(self.counts.sum(axis=1), index=self.row_labels)
+
+    def distinct_per_row(self):
+        """Number of column categories present in each row group."""
+        return pd.Series((self.counts > 0).sum(axis=1), index=self.row_labels)
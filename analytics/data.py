@@ -0,0 +1,322 @@
+"""Cached loading of the crime dataset shared by every page."""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DATA_PATH = Path(
+    os.getenv("CRIME_DATA_PATH", ROOT_DIR / "Data" / "Crimes_Record_No_Outliers.csv")
+)
+
+# ---------------------------
+# Column names & dtypes
+# ---------------------------
+# Alternative spellings mapped onto the names the pages use
+COLUMN_ALIASES = {
+    "lat": "latitude",
+    "lon": "longitude",
+    "lng": "longitude",
+}
+
+# Explicit dtypes (keyed by normalized name) so pandas skips type inference
+DTYPES = {
+    "latitude": "float64",
+    "longitude": "float64",
+    "x coordinate": "float64",
+    "y coordinate": "float64",
+    "primary type": str,
+    "description": str,
+    "location description": str,
+    "location": str,
+    "block": str,
+    "case number": str,
+    "iucr": str,
+    "fbi code": str,
+    "date": str,
+}
+
+
+# ---------------------------
+# Compact in-memory dtypes
+# ---------------------------
+# String columns become categoricals when at most this share of values is distinct
+CATEGORY_MAX_RATIO = 0.5
+
+
+def compact_column(values):
+    """
+    One column in its smallest lossless dtype. Fractional floats (e.g.
+    latitude / longitude) stay float64: the map bins round them to fixed
+    decimals, and float32 would move incidents across cell boundaries.
+    """
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+        return values
+
+    if pd.api.types.is_integer_dtype(values):
+        return pd.to_numeric(values, downcast="integer")
+
+    if pd.api.types.is_float_dtype(values):
+        present = values.dropna()
+        if present.empty or not (present == np.round(present)).all():
+            return values
+        if len(present) == len(values):
+            # Whole numbers (district, beat, ward, ...) with nothing missing
+            return pd.to_numeric(values, downcast="integer")
+        if present.abs().max() < 2**24:
+            # float32 holds every integer below 2**24 exactly (and NaN)
+            return values.astype("float32")
+        return values
+
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values
+
+    if pd.api.types.is_string_dtype(values) or values.dtype == object:
+        codes, categories = pd.factorize(values, sort=True)
+        if len(categories) <= CATEGORY_MAX_RATIO * len(values):
+            return pd.Series(
+                pd.Categorical.from_codes(codes, categories=categories),
+                index=values.index, name=values.name,
+            )
+    return values
+
+
+def compact_dtypes(df):
+    """
+    A copy of df with categoricals for repetitive strings and the smallest
+    integer type for whole-number columns.
+    """
+    return pd.DataFrame(
+        {name: compact_column(values) for name, values in df.items()},
+        index=df.index,
+    )
+
+
+def memory_report(df):
+    """Deep memory use per column (largest first) plus a total row."""
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "dtype": df.dtypes.astype(str),
+        "MB": usage / 2**20,
+        "share": usage / usage.sum(),
+    }).sort_values("MB", ascending=False)
+    report.loc["total"] = ["", report["MB"].sum(), 1.0]
+    return report
+
+
+# Rows per frame when streaming the dataset (iter_dataset)
+CHUNK_ROWS = 500_000
+
+# Format of the `date` column in the city export, e.g. "01/05/2023 03:45:00 PM"
+DATE_FORMAT = "%m/%d/%Y %I:%M:%S %p"
+
+
+def parse_dates(values, date_format=DATE_FORMAT):
+    """
+    Parse date strings with an explicit format (no per-row inference).
+
+    Falls back to pandas' format inference only when the explicit format does
+    not fit the data at all.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+
+    parsed = pd.to_datetime(values, format=date_format, errors="coerce")
+    if parsed.isna().all() and values.notna().any():
+        parsed = pd.to_datetime(values, errors="coerce")
+    return parsed
+
+
+def normalize_columns(columns):
+    """Strip/lowercase column names and apply COLUMN_ALIASES."""
+    names = pd.Index(columns).str.strip().str.lower()
+    return pd.Index([COLUMN_ALIASES.get(name, name) for name in names])
+
+
+# ---------------------------
+# Files & versions
+# ---------------------------
+def parquet_path(path=DATA_PATH):
+    """
+    Location of the columnar copy written by `python -m analytics.ingest`:
+    a directory of Parquet parts (one per ingest / append).
+    """
+    return Path(path).with_suffix(".parquet")
+
+
+def parquet_parts(path):
+    """Part files of a Parquet copy, in row order (a plain file is its own part)."""
+    path = Path(path)
+    if path.is_dir():
+        return sorted(path.glob("part-*.parquet"))
+    return [path] if path.exists() else []
+
+
+def file_version(path):
+    """Cheap fingerprint of a file (or Parquet directory); changes on every rewrite."""
+    parts = parquet_parts(path) if is_parquet(path) else [Path(path)]
+    stats = [part.stat() for part in parts]
+    mtime = max(stat.st_mtime_ns for stat in stats)
+    size = sum(stat.st_size for stat in stats)
+    return f"{mtime:x}-{size:x}-{len(stats)}" if len(stats) > 1 else f"{mtime:x}-{size:x}"
+
+
+def source_path(path=DATA_PATH):
+    """The Parquet copy when it is at least as new as the CSV, otherwise the CSV."""
+    path = Path(path)
+    parts = parquet_parts(parquet_path(path))
+    if parts and (
+        not path.exists()
+        or max(part.stat().st_mtime_ns for part in parts) >= path.stat().st_mtime_ns
+    ):
+        return parquet_path(path)
+    return path
+
+
+def dataset_version(path=DATA_PATH):
+    """
+    Fingerprint of the dataset itself: the CSV when there is one (converting
+    it to Parquet does not change the version), otherwise the Parquet copy.
+    """
+    path = Path(path)
+    return file_version(path if path.exists() else source_path(path))
+
+
+def is_parquet(path):
+    return Path(path).suffix == ".parquet"
+
+
+# ---------------------------
+# Readers
+# ---------------------------
+def dataset_columns(path=DATA_PATH):
+    """Normalized column names, read from the header / schema only."""
+    source = source_path(path)
+    if is_parquet(source):
+        import pyarrow.parquet as pq
+
+        return list(pq.read_schema(parquet_parts(source)[0]).names)
+    return list(normalize_columns(pd.read_csv(source, nrows=0).columns))
+
+
+def read_csv(path, columns=None, **kwargs):
+    """
+    Read a crime CSV with normalized names and explicit dtypes; `date` is
+    parsed to datetime64 with DATE_FORMAT.
+
+    `columns` are normalized names; only those present in the file are read.
+    Extra keyword arguments go straight to `pd.read_csv`.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    names = normalize_columns(header)
+    if hasattr(path, "seek"):
+        # In-memory buffer (e.g. a byte range of a larger file): rewind
+        path.seek(0)
+
+    usecols = [
+        raw for raw, name in zip(header, names)
+        if columns is None or name in columns
+    ]
+    dtype = {
+        raw: DTYPES[name]
+        for raw, name in zip(header, names)
+        if name in DTYPES and raw in usecols
+    }
+
+    result = pd.read_csv(path, usecols=usecols, dtype=dtype, **kwargs)
+    if isinstance(result, pd.DataFrame):
+        result.columns = normalize_columns(result.columns)
+        if "date" in result.columns:
+            result["date"] = parse_dates(result["date"])
+    return result
+
+
+def read_parquet(path, columns=None):
+    """Read (and memory-map) only the requested columns of the Parquet copy."""
+    import pyarrow.parquet as pq
+
+    parts = [str(part) for part in parquet_parts(path)]
+    if columns is not None:
+        available = pq.read_schema(parts[0]).names
+        columns = [name for name in available if name in columns]
+    # Explicit part list keeps rows in ingest / append order
+    return pq.read_table(parts, columns=columns, memory_map=True).to_pandas()
+
+
+def iter_dataset(path=DATA_PATH, columns=None, chunk_rows=CHUNK_ROWS):
+    """
+    The current source file as a stream of frames of at most chunk_rows rows
+    (normalized names, same dtypes as read_dataset), for single-pass jobs.
+    """
+    source = source_path(path)
+    if is_parquet(source):
+        import pyarrow.parquet as pq
+
+        for part in parquet_parts(source):
+            parquet_file = pq.ParquetFile(part)
+            part_columns = None
+            if columns is not None:
+                part_columns = [name for name in parquet_file.schema_arrow.names if name in columns]
+            for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=part_columns):
+                yield batch.to_pandas()
+    else:
+        with read_csv(source, columns, chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                chunk.columns = normalize_columns(chunk.columns)
+                if "date" in chunk.columns:
+                    chunk["date"] = parse_dates(chunk["date"])
+                yield chunk
+
+
+# ---------------------------
+# Loader
+# ---------------------------
+def read_dataset(path=DATA_PATH, columns=None):
+    """
+    Uncached read of the current source file (for batch jobs outside
+    Streamlit), in compact dtypes.
+    """
+    source = source_path(path)
+    if is_parquet(source):
+        return compact_dtypes(read_parquet(source, columns))
+    return compact_dtypes(read_csv(source, columns))
+
+
+@st.cache_resource(max_entries=8, show_spinner="Loading crime dataset...")
+def _read_dataset(path, version, columns):
+    return read_dataset(path, columns)
+
+
+@st.cache_resource(max_entries=2)
+def _read_preview(path, version, n):
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+
+        first_part = parquet_parts(path)[0]
+        batch = next(pq.ParquetFile(first_part).iter_batches(batch_size=n), None)
+        return batch.to_pandas() if batch is not None else read_parquet(path)
+    return read_csv(path, nrows=n)
+
+
+def load_crimes(path=DATA_PATH, columns=None):
+    """
+    Return the crime dataset, parsed once per file version.
+
+    Pass `columns` (normalized names) to load only those columns; names the
+    dataset does not have are ignored. The parsed frame is shared across
+    reruns and sessions, so callers get a shallow copy: adding or replacing
+    columns is safe, editing values in place is not.
+    """
+    source = source_path(path)
+    if columns is not None:
+        columns = tuple(columns)
+    return _read_dataset(str(source), file_version(source), columns).copy(deep=False)
+
+
+def load_preview(n=5, path=DATA_PATH):
+    """First `n` records with every column, without loading the full dataset."""
+    source = source_path(path)
+    return _read_preview(str(source), file_version(source), n)
@@ -0,0 +1,83 @@
+"""
+UMAP embedding for the clustering page, sized for large datasets.
+
+UMAP is fitted on a stratified subsample only (its neighbour graph is built
+with approximate nearest neighbours, NN-descent); every other row is placed
+with the fitted model's transform, TRANSFORM_BATCH rows at a time. Features
+are standardized with the PCA basis' statistics, so both embeddings see the
+same inputs, and the fit can start from the PCA coordinates.
+
+umap-learn is optional: umap_available() tells the page whether to offer it.
+"""
+
+import importlib.util
+
+import numpy as np
+
+from analytics.reduction import project
+from analytics.sampling import stratified_sample_index
+
+UMAP_SAMPLE = 20_000
+TRANSFORM_BATCH = 50_000
+
+
+def umap_available():
+    return importlib.util.find_spec("umap") is not None
+
+
+def _standardize(X, basis):
+    # Missing values land on the feature mean (0 after scaling)
+    return np.nan_to_num((np.asarray(X, dtype=float) - basis.mean) / basis.scale)
+
+
+def fit_sample_index(n_rows, sample_size=UMAP_SAMPLE, strata=None, seed=42):
+    """Sorted rows to fit on: all of them, or a (stratified) random subsample."""
+    if n_rows <= sample_size:
+        return np.arange(n_rows)
+    if strata is not None:
+        return stratified_sample_index(strata, fraction=sample_size / n_rows, seed=seed)
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(n_rows, sample_size, replace=False))
+
+
+def umap_embedding(X, basis, n_components=2, n_neighbors=15, min_dist=0.1,
+                   sample_size=UMAP_SAMPLE, strata=None, pca_init=True, seed=42,
+                   batch_size=TRANSFORM_BATCH):
+    """
+    UMAP coordinates (float32, len(X) × n_components) for every row of X.
+
+    strata (e.g. the crime type column) keeps every group represented in the
+    fitted subsample; pca_init starts the layout from the PCA projection
+    instead of the spectral initialisation.
+    """
+    import umap
+
+    fit_index = fit_sample_index(len(X), sample_size, strata, seed)
+    X_fit = _standardize(X[fit_index], basis)
+
+    init = "spectral"
+    if pca_init:
+        init = project(X[fit_index], basis, n_components)
+        init = np.nan_to_num(init)
+        # Same coordinate range UMAP uses for its own PCA initialisation
+        init = 10.0 * init / max(np.abs(init).max(), 1e-12)
+
+    reducer = umap.UMAP(
+        n_components=n_components,
+        n_neighbors=n_neighbors,
+        min_dist=min_dist,
+        init=init,
+        random_state=seed,
+        low_memory=True,
+        force_approximation_algorithm=True,
+    )
+    reducer.fit(X_fit)
+
+    embedding = np.empty((len(X), n_components), dtype=np.float32)
+    embedding[fit_index] = reducer.embedding_
+
+    rest = np.setdiff1d(np.arange(len(X)), fit_index, assume_unique=True)
+    for start in range(0, len(rest), batch_size):
+        rows = rest[start:start + batch_size]
+        embedding[rows] = reducer.transform(_standardize(X[rows], basis))
+    return embedding
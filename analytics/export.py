@@ -0,0 +1,106 @@
+"""
+Chunked, compressed export of the clustered dataset (download section).
+
+Rows are written CHUNK_ROWS at a time, so peak memory is one chunk plus the
+compressor rather than a second copy of the dataset as one CSV string. Files
+are cached on disk in one directory per dataset version, named by the export
+parameters; a repeated download is a file read.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from analytics.data import DATE_FORMAT
+
+CHUNK_ROWS = 100_000
+EXPORT_DIR = Path(tempfile.gettempdir()) / "crime_exports"
+
+# label -> (file suffix, MIME type, compression)
+EXPORT_FORMATS = {
+    "CSV (gzip)": (".csv.gz", "application/gzip", "gzip"),
+    "CSV (zstd)": (".csv.zst", "application/zstd", "zstd"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet", "zstd"),
+    "CSV": (".csv", "text/csv", None),
+}
+
+
+def _chunks(df, rows=None, chunk_rows=CHUNK_ROWS):
+    """Slices of df (restricted to the boolean mask `rows`), chunk_rows at a time."""
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        if rows is not None:
+            chunk = chunk[rows[start:start + chunk_rows]]
+        if len(chunk):
+            yield chunk
+
+
+def write_csv(df, path, compression=None, rows=None):
+    """CSV in the source date format, compressed as a stream ("gzip" / "zstd")."""
+    sink = pa.OSFile(str(path), "wb")
+    if compression:
+        sink = pa.CompressedOutputStream(sink, compression)
+    with sink:
+        header = True
+        for chunk in _chunks(df, rows):
+            sink.write(
+                chunk.to_csv(index=False, header=header, date_format=DATE_FORMAT).encode("utf-8")
+            )
+            header = False
+        if header:
+            sink.write(df.iloc[:0].to_csv(index=False).encode("utf-8"))
+
+
+def write_parquet(df, path, compression="zstd", rows=None):
+    """Parquet with one row group per chunk."""
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(str(path), schema, compression=compression) as writer:
+        for chunk in _chunks(df, rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def export_path(version, export_format, params):
+    """Cache file for a dataset version, format and any export parameters."""
+    suffix = EXPORT_FORMATS[export_format][0]
+    digest = hashlib.sha1(repr((export_format, params)).encode()).hexdigest()[:16]
+    return EXPORT_DIR / version / f"{digest}{suffix}"
+
+
+def export_frame(df, version, export_format, columns=None, rows=None, params=()):
+    """
+    Path of df (selected columns, rows where the mask `rows` is True) in
+    export_format, written once per (dataset version, format, params).
+    `params` must identify the content, e.g. the filtered view's version,
+    the clustering settings and the selections.
+    """
+    path = export_path(version, export_format, params)
+    if path.exists():
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Exports of older dataset versions are never requested again
+    for stale in EXPORT_DIR.iterdir():
+        if stale.is_dir() and stale.name != version:
+            shutil.rmtree(stale, ignore_errors=True)
+
+    if columns is not None:
+        df = df[list(columns)]
+    if rows is not None:
+        rows = np.asarray(rows, dtype=bool)
+
+    _, _, compression = EXPORT_FORMATS[export_format]
+    # Per-thread temp name: two sessions may render the same file at once
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    if export_format == "Parquet":
+        write_parquet(df, tmp_path, compression, rows)
+    else:
+        write_csv(df, tmp_path, compression, rows)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,231 @@
+"""
+Shared sidebar filters (date range, crime type, district) backed by indexes.
+
+A FilterIndex is built once per dataset version. Rows are kept in date
+order, so a date range is two binary searches; each crime type and district
+keeps the (date-ordered) positions of its rows, so a type or district filter
+clips those lists to the range with two more searches per value. When both
+are set, the shorter list is checked against the other filter through a
+per-row code lookup. Only the selected rows are ever touched; building the
+final row ids is one pass over a bitmap, which also returns them in dataset
+order, so a filtered page computes exactly what a boolean mask would give.
+
+Pages key their caches on filtered_version(), the dataset version plus a
+digest of the selection: the unfiltered view keeps the plain version (and
+its precomputed artifacts), and a filtered view, having no artifacts of its
+own, is computed live and cached per selection.
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from analytics.data import DATA_PATH, file_version, read_dataset, source_path
+
+FILTER_COLUMNS = ["date", "primary type", "district"]
+
+# Widget keys; re-assigned on every page so the selection survives navigation
+FILTER_KEYS = ("filter_dates", "filter_crime_types", "filter_districts")
+
+NO_FILTERS = {"start": None, "end": None, "crime_types": (), "districts": ()}
+
+# Sort key of rows without a date (after every real date)
+NO_DATE = np.iinfo(np.int64).max
+
+
+def _grouped_positions(codes, n_labels):
+    # Positions grouped by code (ascending within each group) + group offsets
+    positions = np.argsort(codes, kind="stable")
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=n_labels))])
+    return positions, offsets
+
+
+class FilterIndex:
+    """Date-sorted row order with per crime type / district position lists."""
+
+    def __init__(self, order, dates, columns):
+        # order: row ids in date order; dates: int64 ns in that order (NaT last)
+        # columns: name -> (codes in date order, labels, positions, offsets)
+        self.order = order
+        self.dates = dates
+        self.columns = columns
+
+    @classmethod
+    def from_frame(cls, df, date_col="date", category_col="primary type",
+                   district_col="district"):
+        if date_col in df.columns:
+            dates = pd.to_datetime(df[date_col]).to_numpy("datetime64[ns]").view(np.int64)
+            dates = np.where(dates == np.iinfo(np.int64).min, NO_DATE, dates)
+        else:
+            dates = np.full(len(df), NO_DATE, dtype=np.int64)
+        order = np.argsort(dates, kind="stable")
+
+        columns = {}
+        for name, col in (("crime_types", category_col), ("districts", district_col)):
+            if col not in df.columns:
+                continue
+            codes, labels = pd.factorize(df[col].to_numpy()[order], sort=True)
+            codes = np.where(codes < 0, len(labels), codes).astype(np.int32)
+            positions, offsets = _grouped_positions(codes, len(labels) + 1)
+            columns[name] = (codes, pd.Index(labels), positions, offsets)
+
+        return cls(order, dates[order], columns)
+
+    def __len__(self):
+        return len(self.order)
+
+    def labels(self, name):
+        """Filter values available for "crime_types" / "districts"."""
+        return list(self.columns[name][1]) if name in self.columns else []
+
+    def date_bounds(self):
+        """(first, last) incident date, or None when no row has a date."""
+        n_dated = np.searchsorted(self.dates, NO_DATE, side="left")
+        if not n_dated:
+            return None
+        return pd.Timestamp(self.dates[0]).date(), pd.Timestamp(self.dates[n_dated - 1]).date()
+
+    def _date_range(self, start, end):
+        # [lo, hi) positions of dates in [start, end + 1 day)
+        lo, hi = 0, len(self.dates)
+        if start is not None:
+            lo = np.searchsorted(self.dates, pd.Timestamp(start).value, side="left")
+        if end is not None:
+            stop = (pd.Timestamp(end) + pd.Timedelta(days=1)).value
+            hi = np.searchsorted(self.dates, stop, side="left")
+        return lo, max(lo, hi)
+
+    def _positions(self, name, values, lo, hi):
+        # Positions in [lo, hi) whose `name` value is one of `values`, as
+        # one slice (a view, nothing copied) per value
+        _, labels, positions, offsets = self.columns[name]
+        parts = []
+        for code in labels.get_indexer(list(values)):
+            if code < 0:
+                continue
+            group = positions[offsets[code]:offsets[code + 1]]
+            parts.append(group[np.searchsorted(group, lo):np.searchsorted(group, hi)])
+        return parts
+
+    def _matches(self, name, values, positions):
+        # Which positions have a `name` value in `values` (code lookup table)
+        codes, labels, _, _ = self.columns[name]
+        wanted = np.zeros(len(labels) + 1, dtype=bool)
+        found = labels.get_indexer(list(values))
+        wanted[found[found >= 0]] = True
+        return positions[wanted[codes[positions]]]
+
+    def select(self, start=None, end=None, crime_types=(), districts=()):
+        """
+        Row ids (ascending) of incidents matching every given filter, or None
+        when nothing is filtered. Empty crime_types / districts mean "all".
+        """
+        filters = {
+            name: values for name, values in
+            (("crime_types", crime_types), ("districts", districts))
+            if values and name in self.columns
+        }
+        if start is None and end is None and not filters:
+            return None
+
+        lo, hi = self._date_range(start, end)
+        if filters:
+            # Start from the shortest position list, check the rest per row
+            parts = {name: self._positions(name, values, lo, hi) for name, values in filters.items()}
+            first = min(parts, key=lambda name: sum(map(len, parts[name])))
+            positions = np.concatenate([np.empty(0, dtype=np.int64)] + parts[first])
+            for name, values in filters.items():
+                if name != first:
+                    positions = self._matches(name, values, positions)
+            rows = self.order[positions]
+        else:
+            rows = self.order[lo:hi]
+
+        # Dataset order through a bitmap (linear, unlike sorting the ids)
+        mask = np.zeros(len(self.order), dtype=bool)
+        mask[rows] = True
+        return np.flatnonzero(mask)
+
+
+def filtered_version(version, filters):
+    """Cache / artifact key of a filtered view (the version itself when unfiltered)."""
+    if filters == NO_FILTERS:
+        return version
+    digest = hashlib.sha1(repr(sorted(filters.items())).encode()).hexdigest()[:12]
+    return f"{version}-f{digest}"
+
+
+def take_rows(df, rows):
+    """The filtered view of df (df itself when rows is None)."""
+    return df if rows is None else df.take(rows)
+
+
+# ---------------------------
+# Streamlit
+# ---------------------------
+@st.cache_resource(max_entries=2, show_spinner="Indexing dates, crime types and districts...")
+def _build_filter_index(path, version):
+    return FilterIndex.from_frame(read_dataset(path, FILTER_COLUMNS))
+
+
+def load_filter_index(path=DATA_PATH):
+    """FilterIndex of the current dataset, built once per file version."""
+    source = source_path(path)
+    return _build_filter_index(str(source), file_version(source))
+
+
+def filter_sidebar(index):
+    """Render the shared filters; returns the selection (see NO_FILTERS)."""
+    # Keep the selection when switching pages (widget state is per page)
+    for key in FILTER_KEYS:
+        if key in st.session_state:
+            st.session_state[key] = st.session_state[key]
+
+    st.sidebar.header("Filters")
+    filters = dict(NO_FILTERS)
+
+    bounds = index.date_bounds()
+    if bounds is not None:
+        # Default (and reset, after the data changed) to the full range
+        selected = tuple(st.session_state.get("filter_dates", ()))
+        if not selected or not all(bounds[0] <= day <= bounds[1] for day in selected):
+            st.session_state["filter_dates"] = bounds
+        dates = st.sidebar.date_input(
+            "Date Range", min_value=bounds[0], max_value=bounds[1], key="filter_dates"
+        )
+        # A range that is still being picked has only its start
+        start, end = (tuple(dates) + (None, None))[:2]
+        if start is not None and start > bounds[0]:
+            filters["start"] = start
+        if end is not None and end < bounds[1]:
+            filters["end"] = end
+
+    for name, label, key in (
+        ("crime_types", "Crime Types", "filter_crime_types"),
+        ("districts", "Districts", "filter_districts"),
+    ):
+        options = index.labels(name)
+        if key in st.session_state:
+            st.session_state[key] = [value for value in st.session_state[key] if value in options]
+        if options:
+            selected = st.sidebar.multiselect(label, options, placeholder="All", key=key)
+            filters[name] = tuple(sorted(selected, key=options.index))
+
+    return filters
+
+
+def filtered_rows(version):
+    """
+    Shared sidebar filters for a page: (row ids or None, view version).
+
+    Stops the page with a warning when the selection matches no incident.
+    """
+    index = load_filter_index()
+    filters = filter_sidebar(index)
+    rows = index.select(**filters)
+    if rows is not None and not len(rows):
+        st.warning("No incidents match the selected filters")
+        st.stop()
+    return rows, filtered_version(version, filters)
@@ -0,0 +1,190 @@
+"""
+Top-N crime hotspots for the Geographic Map page.
+
+Incidents are projected to metres and bucketed into a uniform grid whose
+cells are one search radius wide, so "incidents within r of this point"
+only ever scans the 3 × 3 block of cells around it. Hotspots are kernel
+density peaks: cells are ranked by the incidents in their 3 × 3 block, each
+candidate is moved to the mean of the incidents within r (mean shift) until
+it settles, and a peak closer than 2r to a stronger one is dropped, so no
+incident counts towards two hotspots. The cost is one sort of the points
+plus work proportional to the incidents near the candidates: near-linear,
+never pairwise, and independent of where the fixed round(4) cells fall.
+"""
+
+import numpy as np
+import pandas as pd
+
+from analytics.crosstab import Crosstab
+
+EARTH_RADIUS_M = 6_371_000.0
+
+# Search radius (metres) choices on the page; the precompute job covers all
+HOTSPOT_RADII_M = (100, 250, 500, 1000)
+HOTSPOT_RADIUS_M = 250
+TOP_HOTSPOTS = 20
+
+# Peaks need at least this many incidents within the radius
+MIN_INCIDENTS = 3
+MEAN_SHIFT_ITERATIONS = 10
+
+
+def to_metres(latitude, longitude, lat0):
+    """Equirectangular projection around latitude lat0 (accurate at city scale)."""
+    lat = np.radians(np.asarray(latitude, dtype=float))
+    lon = np.radians(np.asarray(longitude, dtype=float))
+    return lon * EARTH_RADIUS_M * np.cos(np.radians(lat0)), lat * EARTH_RADIUS_M
+
+
+def to_degrees(x, y, lat0):
+    return (
+        np.degrees(y / EARTH_RADIUS_M),
+        np.degrees(x / (EARTH_RADIUS_M * np.cos(np.radians(lat0)))),
+    )
+
+
+class PointGrid:
+    """Uniform grid over projected points; cells are `cell` metres wide."""
+
+    def __init__(self, x, y, cell):
+        self.x, self.y, self.cell = x, y, cell
+        ix = np.floor(x / cell).astype(np.int64)
+        iy = np.floor(y / cell).astype(np.int64)
+        self.ix_min, self.iy_min = ix.min(), iy.min()
+        # One empty cell of padding on each side, so ±1 never wraps a row
+        self.n_y = int(iy.max() - self.iy_min) + 3
+
+        keys = self._key(ix, iy)
+        self.order = np.argsort(keys, kind="stable")
+        self.cells, self.starts, self.counts = np.unique(
+            keys[self.order], return_index=True, return_counts=True
+        )
+        self.offsets = np.array([dx * self.n_y + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+
+    def _key(self, ix, iy):
+        return (ix - self.ix_min + 1) * self.n_y + (iy - self.iy_min + 1)
+
+    def _lookup(self, keys):
+        # Positions in self.cells, and which of the keys are occupied cells
+        pos = np.minimum(np.searchsorted(self.cells, keys), len(self.cells) - 1)
+        return pos, self.cells[pos] == keys
+
+    def block_counts(self):
+        """Points in the 3 × 3 block around every occupied cell."""
+        total = np.zeros(len(self.cells), dtype=np.int64)
+        for offset in self.offsets:
+            pos, found = self._lookup(self.cells + offset)
+            total += np.where(found, self.counts[pos], 0)
+        return total
+
+    def cell_points(self, c):
+        """Indices of the points in occupied cell number c."""
+        return self.order[self.starts[c]:self.starts[c] + self.counts[c]]
+
+    def within(self, x, y, radius):
+        """Indices of the points within radius (<= cell) of (x, y)."""
+        key = self._key(
+            np.int64(np.floor(x / self.cell)), np.int64(np.floor(y / self.cell))
+        )
+        pos, found = self._lookup(key + self.offsets)
+        idx = np.concatenate(
+            [np.empty(0, dtype=np.int64)] + [self.cell_points(c) for c in pos[found]]
+        )
+        inside = (self.x[idx] - x) ** 2 + (self.y[idx] - y) ** 2 <= radius ** 2
+        return idx[inside]
+
+
+def _mean_shift(grid, x, y, radius):
+    """Move (x, y) to the mean of the points within radius until it settles."""
+    members = grid.within(x, y, radius)
+    for _ in range(MEAN_SHIFT_ITERATIONS):
+        if not len(members):
+            break
+        new_x, new_y = grid.x[members].mean(), grid.y[members].mean()
+        moved = np.hypot(new_x - x, new_y - y)
+        x, y = new_x, new_y
+        members = grid.within(x, y, radius)
+        if moved < 0.01 * radius:
+            break
+    return x, y, members
+
+
+class Hotspots:
+    """Ranked hotspots (centroid, radius, count) and their crime-type mix."""
+
+    def __init__(self, table, mix):
+        self.table = table
+        self.mix = mix
+
+    @classmethod
+    def detect(cls, latitude, longitude, categories, radius_m=HOTSPOT_RADIUS_M,
+               n=TOP_HOTSPOTS):
+        categories = pd.Categorical(categories)
+        latitude = np.asarray(latitude, dtype=float)
+        if len(latitude) == 0:
+            return cls._from_members([], [], [], categories, [])
+
+        lat0 = float(np.median(latitude))
+        x, y = to_metres(latitude, longitude, lat0)
+        grid = PointGrid(x, y, radius_m)
+
+        density = grid.block_counts()
+        centres, members = [], []
+        for c in np.argsort(-density, kind="stable"):
+            if len(centres) == n or density[c] < MIN_INCIDENTS:
+                break
+
+            start = grid.cell_points(c)
+            cx, cy, found = _mean_shift(grid, x[start].mean(), y[start].mean(), radius_m)
+            if len(found) < MIN_INCIDENTS or any(
+                np.hypot(cx - px, cy - py) < 2 * radius_m for px, py in centres
+            ):
+                continue
+            centres.append((cx, cy))
+            members.append(found)
+
+        lat, lon = to_degrees(
+            np.array([cx for cx, _ in centres]), np.array([cy for _, cy in centres]), lat0
+        )
+        radii = [np.hypot(x[m] - cx, y[m] - cy).max() for m, (cx, cy) in zip(members, centres)]
+        hotspots = cls._from_members(members, lat, lon, categories, radii)
+        # Most incidents first (mean shift can reorder the density ranking)
+        order = np.argsort(-hotspots.table["crime_count"].to_numpy(), kind="stable")
+        return hotspots._reordered(order)
+
+    @classmethod
+    def _from_members(cls, members, lat, lon, categories, radii):
+        ranks = np.full(len(categories), -1, dtype=np.int64)
+        for rank, found in enumerate(members):
+            ranks[found] = rank
+
+        labels = pd.RangeIndex(1, len(members) + 1, name="Hotspot")
+        mix = Crosstab.from_codes(
+            ranks, categories.codes, labels, pd.Index(categories.categories, name="Crime Type")
+        )
+        counts = mix.counts.sum(axis=1)
+        table = pd.DataFrame({
+            "latitude": np.asarray(lat, dtype=float),
+            "longitude": np.asarray(lon, dtype=float),
+            "radius_m": np.round(np.asarray(radii, dtype=float), 1),
+            "crime_count": counts,
+            "top_crime_type": mix.col_labels.take(mix.counts.argmax(axis=1) if len(members) else []),
+        }, index=labels)
+        return cls(table, mix)
+
+    def _reordered(self, order):
+        labels = self.table.index
+        table = self.table.iloc[order].set_axis(labels)
+        mix = Crosstab(self.mix.counts[order], labels, self.mix.col_labels)
+        return Hotspots(table, mix)
+
+    # ---------------------------
+    # Queries
+    # ---------------------------
+    def top(self, n):
+        """The n hotspots with the most incidents."""
+        return self.table.head(n)
+
+    def crime_mix(self, hotspot):
+        """Crime type counts inside one hotspot, most frequent first."""
+        return self.mix.row(hotspot)
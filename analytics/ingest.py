@@ -0,0 +1,232 @@
+"""
+Ingestion: convert the crime CSV into a columnar Parquet copy, and append
+daily deltas without reprocessing history.
+
+    python -m analytics.ingest [path/to/crimes.csv]
+    python -m analytics.ingest --append path/to/delta.csv [--refit-clusters]
+    python -m analytics.ingest --chunked [--workers 8] [path/to/crimes.csv]
+
+Once the Parquet copy exists (and is newer than the CSV) the loader reads it
+instead, so pages only pay for the columns they request. Every mode also
+writes the dataset manifest (analytics.manifest) next to the CSV. An append adds the
+delta to the CSV and as a new Parquet part, then rolls every precomputed
+artifact forward to the new dataset version by merging in the delta's
+aggregates — work proportional to the delta, not to the history.
+--chunked builds the same mergeable artifacts from a CSV too large to load,
+in parallel byte-range chunks (see analytics.chunked).
+"""
+
+import argparse
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analytics import pipeline
+from analytics.artifacts import list_artifacts, load_artifact, save_artifact
+from analytics.chunked import CHUNK_BYTES, ingest_chunked
+from analytics.clustering import assign_labels
+from analytics.data import (
+    DATA_PATH, dataset_version, is_parquet, normalize_columns, parquet_parts,
+    parquet_path, read_csv, source_path,
+)
+from analytics.manifest import write_manifest
+from analytics.profile import DatasetProfile
+
+ROW_GROUP_SIZE = 1_000_000
+
+
+# ---------------------------
+# Parquet copy
+# ---------------------------
+def write_parquet_part(df, directory):
+    """Write df as the next part of a Parquet directory (cast to its schema)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    parts = parquet_parts(directory)
+
+    if parts:
+        schema = pq.read_schema(parts[0])
+        table = pa.Table.from_pandas(
+            df.reindex(columns=schema.names), schema=schema, preserve_index=False
+        )
+    else:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+    target = directory / f"part-{len(parts):05d}.parquet"
+    pq.write_table(table, target, compression="zstd", row_group_size=ROW_GROUP_SIZE)
+    return target
+
+
+def convert_to_parquet(csv_path=DATA_PATH, output_path=None):
+    """
+    Write the normalized, typed CSV as Parquet next to it, plus the dataset
+    manifest; returns the Parquet path.
+    """
+    output_path = Path(output_path or parquet_path(csv_path))
+    if output_path.is_dir():
+        shutil.rmtree(output_path)
+    elif output_path.exists():
+        output_path.unlink()
+
+    df = read_csv(csv_path)
+    write_parquet_part(df, output_path)
+
+    version = dataset_version(csv_path)
+    profile = DatasetProfile.from_frame(df)
+    save_artifact(profile, "dataset_profile", version)
+    write_manifest(profile, csv_path, version)
+    return output_path
+
+
+# ---------------------------
+# Incremental append
+# ---------------------------
+def _append_csv_rows(delta_path, csv_path):
+    # Append the delta as text, in the history's column order, so the CSV
+    # stays byte-compatible with the export (dates are not re-formatted)
+    header = pd.read_csv(csv_path, nrows=0).columns
+    raw = pd.read_csv(delta_path, dtype=str, keep_default_na=False)
+    raw.columns = normalize_columns(raw.columns)
+    raw = raw.reindex(columns=normalize_columns(header), fill_value="")
+
+    needs_newline = False
+    with open(csv_path, "rb") as f:
+        if f.seek(0, 2) > 0:
+            f.seek(-1, 2)
+            needs_newline = f.read(1) != b"\n"
+    with open(csv_path, "a", newline="") as f:
+        if needs_newline:
+            f.write("\n")
+        raw.to_csv(f, header=False, index=False, lineterminator="\n")
+
+
+def update_artifacts(delta, old_version, new_version, refit_clusters=False):
+    """
+    Roll old_version's artifacts forward to new_version using only the delta.
+    refit_clusters leaves the clusters out, to be fitted afresh.
+    """
+    names = set(list_artifacts(old_version))
+    features = load_artifact("feature_stats", old_version)
+    feature_cols = pipeline.feature_columns(delta)
+    if features is not None and not pipeline.fitted_on(features["columns"], feature_cols):
+        # The delta brings another feature set: the feature statistics, PCA
+        # basis and clusters are stale and left for the pages to recompute
+        names -= {"feature_stats", "pca_basis"}
+        names = {name for name in names if not name.startswith(("clusters_", "crime_cluster_"))}
+        features = None
+
+    written = []
+
+    def carry(name, update):
+        if name in names:
+            written.append(
+                save_artifact(update(load_artifact(name, old_version)), name, new_version)
+            )
+
+    # Overview counts, map grids, temporal cube, feature statistics
+    for name, partial in pipeline.chunk_aggregates(delta, feature_cols).items():
+        carry(name, lambda old, name=name, partial=partial: pipeline.merge_aggregate(
+            name, old, partial
+        ))
+
+    if features is None:
+        return written
+
+    # PCA basis from the updated standardization statistics
+    basis = pipeline.pca_basis_from_stats(load_artifact("feature_stats", new_version))
+    written.append(save_artifact(basis, "pca_basis", new_version))
+
+    if refit_clusters:
+        return written
+
+    # Clusters: new rows join the nearest existing centroid, projected with
+    # the basis the centroids were fitted in (kept with them, not the one above)
+    X_delta = pipeline.feature_matrix(delta, feature_cols)
+    for name in sorted(names):
+        if not name.startswith("clusters_"):
+            continue
+        n_components, n_clusters = (int(part[1:]) for part in name.split("_")[1:])
+        labels, centroids, cluster_basis = load_artifact(name, old_version)
+
+        X_pca = pipeline.pca_projection(X_delta, cluster_basis, n_components)
+        delta_labels, _ = assign_labels(X_pca, centroids)
+        written.append(save_artifact(
+            (np.concatenate([labels, delta_labels]), centroids, cluster_basis),
+            name, new_version,
+        ))
+
+        if pipeline.CRIME_COLUMN in delta.columns:
+            carry(
+                pipeline.crime_cluster_table_artifact(n_components, n_clusters),
+                lambda table, delta_labels=delta_labels: table.merge(
+                    pipeline.crime_cluster_table(delta, delta_labels)
+                ),
+            )
+
+    return written
+
+
+def append_delta(delta_path, csv_path=DATA_PATH, refit_clusters=False):
+    """
+    Append the incidents in delta_path to the dataset and update artifacts.
+
+    Returns (new dataset version, written artifact paths). Artifacts that
+    cannot be updated incrementally (the balanced map sample, hotspots) are
+    not carried over and are recomputed live on first use; nor are clusters
+    when refit_clusters asks for a full refit. The manifest is rewritten from
+    the merged column profile when one was stored.
+    """
+    csv_path = Path(csv_path)
+    old_version = dataset_version(csv_path)
+    parquet_current = is_parquet(source_path(csv_path))
+
+    delta = read_csv(delta_path)
+    _append_csv_rows(delta_path, csv_path)
+    if parquet_current:
+        # Written after the CSV so the Parquet copy stays the fresher source
+        write_parquet_part(delta, parquet_path(csv_path))
+
+    new_version = dataset_version(csv_path)
+    written = update_artifacts(delta, old_version, new_version, refit_clusters)
+
+    profile = load_artifact("dataset_profile", new_version)
+    if profile is not None:
+        written.append(write_manifest(profile, csv_path, new_version))
+    return new_version, written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crime dataset ingestion")
+    parser.add_argument("csv", nargs="?", default=str(DATA_PATH), help="crime CSV path")
+    parser.add_argument("--append", metavar="DELTA_CSV",
+                        help="append new incidents and update precomputed artifacts")
+    parser.add_argument("--refit-clusters", action="store_true",
+                        help="with --append, drop the clusters instead of extending them")
+    parser.add_argument("--chunked", action="store_true",
+                        help="aggregate the CSV in parallel chunks without loading it")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-mb", type=int, default=CHUNK_BYTES // 2**20,
+                        help="chunk size for --chunked, in MiB")
+    args = parser.parse_args(argv)
+
+    if args.chunked:
+        version, written = ingest_chunked(args.csv, args.chunk_mb * 2**20, args.workers)
+        for path in written:
+            print(f"Wrote {path}")
+        print(f"Aggregated {args.csv} in chunks; dataset version {version}")
+    elif args.append:
+        version, written = append_delta(args.append, args.csv, args.refit_clusters)
+        for path in written:
+            print(f"Updated {path}")
+        print(f"Appended {args.append}; dataset version is now {version}")
+    else:
+        print(f"Wrote {convert_to_parquet(args.csv)}")
+
+
+if __name__ == "__main__":
+    main()
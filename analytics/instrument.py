@@ -0,0 +1,164 @@
+"""
+Per-stage instrumentation for the pages.
+
+Each page rerun records, for every stage it wraps, the wall time, the rows
+processed and (with CRIME_METRICS_MEMORY=1) the peak heap allocated above
+the stage's start (tracemalloc; numpy / pandas buffers included). The stages of the current
+rerun are shown in a collapsible sidebar panel, and every stage is appended
+to a JSONL metrics file so latency percentiles can be graphed across
+sessions:
+
+    python -m analytics.instrument            # p50 / p95 / max per stage
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from analytics.data import ROOT_DIR
+
+METRICS_PATH = Path(os.getenv("CRIME_METRICS_PATH", ROOT_DIR / "metrics" / "stages.jsonl"))
+
+# Peak memory needs tracemalloc, which slows parsing-heavy stages several
+# times over, so it is opt-in (CRIME_METRICS_MEMORY=1)
+TRACK_MEMORY = os.getenv("CRIME_METRICS_MEMORY", "0") == "1"
+
+MB = 1024 ** 2
+
+_write_lock = threading.Lock()
+
+
+def append_metrics(records, path=METRICS_PATH):
+    """Append records as JSON lines (one per stage)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = "".join(json.dumps(record) + "\n" for record in records)
+    with _write_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(lines)
+
+
+def _traced_memory():
+    """(current, peak) traced bytes, or None when memory is not tracked."""
+    if not TRACK_MEMORY:
+        return None
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return tracemalloc.get_traced_memory()
+
+
+class PageRun:
+    """
+    Stage records of one page rerun; every page creates one at the top of
+    its script and shows the panel at the end.
+
+        run = PageRun("Overview")
+        with run.stage("load") as stage:
+            df = load_crimes()
+            stage["rows"] = len(df)
+        ...
+        run.show_panel()
+
+    tracemalloc is process-wide, so with several sessions rendering at once
+    a stage's peak can include their allocations too.
+    """
+
+    def __init__(self, page, path=METRICS_PATH):
+        self.page = page
+        self.path = path
+        self.run_id = uuid.uuid4().hex[:12]
+        self.records = []
+        self._open = []
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        record = {
+            "ts": time.time(), "page": self.page, "run": self.run_id,
+            "stage": name, "rows": rows,
+        }
+
+        memory = _traced_memory()
+        if memory is not None:
+            # The enclosing stage keeps its own peak; ours starts fresh
+            if self._open:
+                self._open[-1]["_peak"] = max(self._open[-1]["_peak"], memory[1])
+            tracemalloc.reset_peak()
+            record["_base"] = record["_peak"] = memory[0]
+
+        self._open.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = round(time.perf_counter() - start, 6)
+            self._open.pop()
+
+            memory = _traced_memory()
+            if memory is not None:
+                peak = max(record.pop("_peak"), memory[1])
+                record["peak_mb"] = round((peak - record.pop("_base")) / MB, 3)
+                if self._open:
+                    self._open[-1]["_peak"] = max(self._open[-1]["_peak"], peak)
+
+            self.records.append(record)
+            append_metrics([record], self.path)
+
+    def to_frame(self):
+        columns = ["stage", "seconds", "rows", "peak_mb"]
+        return pd.DataFrame(self.records).reindex(columns=columns)
+
+    def show_panel(self):
+        """Collapsible sidebar table of this rerun's stages."""
+        with st.sidebar.expander("⏱ Performance"):
+            frame = self.to_frame()
+            st.dataframe(
+                frame.style.format({"seconds": "{:.3f}", "peak_mb": "{:.1f}"}, na_rep=""),
+                hide_index=True
+            )
+            st.caption(
+                f"Rerun {self.run_id}: {frame['seconds'].sum():.3f} s in stages. "
+                f"Logged to {self.path}"
+            )
+
+
+def load_metrics(path=METRICS_PATH):
+    """Every recorded stage as a DataFrame (empty when nothing is logged yet)."""
+    try:
+        return pd.read_json(path, lines=True)
+    except (FileNotFoundError, ValueError):
+        return pd.DataFrame(columns=["ts", "page", "run", "stage", "rows", "seconds", "peak_mb"])
+
+
+def latency_summary(metrics, percentiles=(0.5, 0.95)):
+    """Count, latency percentiles and max per (page, stage)."""
+    grouped = metrics.groupby(["page", "stage"], sort=True)["seconds"]
+    summary = grouped.quantile(list(percentiles)).unstack()
+    summary.columns = [f"p{round(q * 100)}" for q in summary.columns]
+    summary.insert(0, "count", grouped.size())
+    summary["max"] = grouped.max()
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stage latency percentiles")
+    parser.add_argument("--metrics", default=METRICS_PATH, help="JSONL metrics file")
+    args = parser.parse_args(argv)
+
+    metrics = load_metrics(args.metrics)
+    if metrics.empty:
+        print(f"No metrics in {args.metrics}")
+        return
+    with pd.option_context("display.width", 120, "display.max_rows", None):
+        print(latency_summary(metrics).round(4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Dataset manifest: column roles, schema and statistics, written at ingestion.
+
+Every `python -m analytics.ingest` mode and the precompute job write
+<data>.manifest.json next to the CSV:
+
+    {"version": ..., "rows": ..., "roles": {...}, "columns": {name: {...}}}
+
+`roles` names the columns the pages rely on (category, location,
+coordinates, timestamp, identifiers and the clustering features) and
+`columns` holds each column's dtype, null count, min / max / mean and
+(approximate) distinct count. Pages read it instead of rediscovering the
+schema or scanning the data. It is rendered from a DatasetProfile, stored as
+the `dataset_profile` artifact so `ingest --append` can merge the delta in.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from analytics import pipeline
+from analytics.data import DATA_PATH, dataset_columns, dataset_version, iter_dataset
+from analytics.profile import DatasetProfile
+
+# Rows read for the roles and dtypes when no current manifest exists
+SCHEMA_SAMPLE_ROWS = 1_000
+
+
+def manifest_path(path=DATA_PATH):
+    return Path(path).with_suffix(".manifest.json")
+
+
+def column_roles(dtypes):
+    """Role -> column name (or list of names), resolved from names and dtypes."""
+    columns = list(dtypes.index)
+    crime_col, location_col = pipeline.overview_columns(columns)
+    has_coordinates = {"latitude", "longitude"} <= set(columns)
+    return {
+        "category": pipeline.map_category_column(columns) or crime_col,
+        "location": location_col,
+        "coordinates": ["latitude", "longitude"] if has_coordinates else None,
+        "timestamp": "date" if "date" in columns else None,
+        "identifiers": [name for name in pipeline.IDENTIFIER_COLUMNS if name in columns],
+        "features": [name for name, dtype in dtypes.items() if pipeline.is_feature(name, dtype)],
+    }
+
+
+def build_manifest(profile, version):
+    return {
+        "version": version,
+        "rows": profile.rows,
+        "roles": column_roles(profile.dtypes()),
+        "columns": profile.summary(),
+    }
+
+
+def stream_profile(path=DATA_PATH):
+    """DatasetProfile in one pass over the dataset, a chunk at a time."""
+    profile = None
+    for chunk in iter_dataset(path):
+        chunk_profile = DatasetProfile.from_frame(chunk)
+        profile = chunk_profile if profile is None else profile.merge(chunk_profile)
+    return profile
+
+
+def write_manifest(profile, path=DATA_PATH, version=None):
+    """Write the profile's manifest next to the data (atomically); returns its path."""
+    target = manifest_path(path)
+    manifest = build_manifest(profile, version or dataset_version(path))
+
+    tmp_path = target.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, target)
+    return target
+
+
+def read_manifest(path=DATA_PATH):
+    """The stored manifest, or None when there is none."""
+    try:
+        with open(manifest_path(path), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def schema_manifest(path=DATA_PATH, version=None):
+    """
+    Roles and dtypes from the first rows only, for a dataset not ingested
+    yet: `rows` is None and columns carry no statistics.
+    """
+    chunks = iter_dataset(path, chunk_rows=SCHEMA_SAMPLE_ROWS)
+    sample = next(chunks, None)
+    chunks.close()
+    if sample is None:
+        sample = pd.DataFrame(columns=dataset_columns(path))
+
+    manifest = build_manifest(DatasetProfile.from_frame(sample), version or dataset_version(path))
+    manifest["rows"] = None
+    manifest["columns"] = {
+        name: {"dtype": column["dtype"]} for name, column in manifest["columns"].items()
+    }
+    return manifest
+
+
+def column_stat(manifest, column, stat):
+    """One statistic of one column (None without statistics)."""
+    return manifest["columns"].get(column, {}).get(stat)
+
+
+def centre(manifest):
+    """(mean latitude, mean longitude), or None without coordinate statistics."""
+    if not manifest["roles"]["coordinates"]:
+        return None
+    latitude = column_stat(manifest, "latitude", "mean")
+    longitude = column_stat(manifest, "longitude", "mean")
+    if latitude is None or longitude is None:
+        return None
+    return latitude, longitude
+
+
+# ---------------------------
+# Streamlit
+# ---------------------------
+@st.cache_resource(max_entries=2)
+def _load_manifest(path, version, stamp):
+    manifest = read_manifest(path)
+    if manifest is not None and manifest["version"] == version:
+        return manifest
+    # Not ingested yet, or written for an older version of the data
+    return schema_manifest(path, version)
+
+
+def load_manifest(path=DATA_PATH):
+    """
+    Manifest of the current dataset version, re-read whenever the file is
+    rewritten; a schema-only one (see schema_manifest) while none is current.
+    """
+    target = manifest_path(path)
+    stamp = target.stat().st_mtime_ns if target.exists() else None
+    return _load_manifest(str(path), dataset_version(path), stamp)
@@ -0,0 +1,206 @@
+"""
+Patrol recommendations for the Geographic Map page.
+
+Incidents are counted once per dataset version into a sparse table of
+grid cell × hour block × crime type, holding the plain count and a
+recency-weighted count (each incident weighted 0.5 ** (age / half-life),
+age measured from the newest incident). Scoring every cell × hour block is
+then one pass over that table:
+
+    score = sum over crime types of severity[type] *
+            ((1 - recency) * count + recency * recent_count)
+
+so re-ranking for other severity weights, recency emphasis or patrol budget
+never touches the incidents again. Recency-weighted counts rescale exactly to
+a later reference date, so the table merges with an appended delta.
+"""
+
+import numpy as np
+import pandas as pd
+
+from analytics.spatial import cell_keys
+
+# ~110 m cells (3 decimals of latitude / longitude), 4-hour patrol shifts
+PATROL_PRECISION = 3
+HOUR_BLOCK = 4
+RECENCY_HALF_LIFE_DAYS = 180
+
+TOP_RECOMMENDATIONS = 10
+PATROL_UNITS = 20
+
+# Relative harm of a crime type; types not listed weigh 1
+DEFAULT_SEVERITY = {
+    "HOMICIDE": 10,
+    "CRIMINAL SEXUAL ASSAULT": 8,
+    "CRIM SEXUAL ASSAULT": 8,
+    "KIDNAPPING": 7,
+    "HUMAN TRAFFICKING": 7,
+    "ROBBERY": 6,
+    "ARSON": 5,
+    "ASSAULT": 5,
+    "BATTERY": 5,
+    "WEAPONS VIOLATION": 5,
+    "BURGLARY": 4,
+    "MOTOR VEHICLE THEFT": 4,
+    "NARCOTICS": 3,
+    "SEX OFFENSE": 3,
+    "STALKING": 3,
+    "CRIMINAL DAMAGE": 2,
+    "CRIMINAL TRESPASS": 2,
+    "THEFT": 2,
+}
+
+DAY_NS = 86_400 * 10**9
+
+
+def allocate_units(scores, budget):
+    """
+    Split `budget` patrol units over windows ranked by score (best first):
+    one unit each while they last, the rest in proportion to score (largest
+    remainders first).
+    """
+    scores = np.asarray(scores, dtype=float)
+    units = np.zeros(len(scores), dtype=np.int64)
+    covered = min(budget, len(scores))
+    units[:covered] = 1
+
+    spare = budget - covered
+    if spare > 0 and scores.sum() > 0:
+        share = scores / scores.sum() * spare
+        units += np.floor(share).astype(np.int64)
+        left = spare - int(np.floor(share).sum())
+        units[np.argsort(-(share - np.floor(share)), kind="stable")[:left]] += 1
+    return units
+
+
+class PatrolModel:
+    """Counts and recency-weighted counts per cell × hour block × crime type."""
+
+    def __init__(self, entries, crime_types, reference, precision=PATROL_PRECISION,
+                 hour_block=HOUR_BLOCK, half_life_days=RECENCY_HALF_LIFE_DAYS):
+        # entries: lat_key, lon_key, block, type_code, count, recent (sorted
+        # by cell and block, so each cell × block is a contiguous run)
+        self.entries = entries
+        self.crime_types = crime_types
+        self.reference = reference
+        self.precision = precision
+        self.hour_block = hour_block
+        self.half_life_days = half_life_days
+
+    @classmethod
+    def from_arrays(cls, latitude, longitude, dates, hours, categories,
+                    precision=PATROL_PRECISION, hour_block=HOUR_BLOCK,
+                    half_life_days=RECENCY_HALF_LIFE_DAYS):
+        categories = pd.Categorical(categories)
+        dates = pd.to_datetime(pd.Series(dates)).to_numpy("datetime64[ns]").view(np.int64)
+        hours = np.asarray(hours, dtype=float)
+        latitude = np.asarray(latitude, dtype=float)
+        longitude = np.asarray(longitude, dtype=float)
+
+        valid = (
+            np.isfinite(latitude) & np.isfinite(longitude) & np.isfinite(hours)
+            & (dates != np.iinfo(np.int64).min) & (categories.codes >= 0)
+        )
+        dates = dates[valid]
+        reference = int(dates.max()) if len(dates) else 0
+
+        entries = pd.DataFrame({
+            "lat_key": cell_keys(latitude[valid], precision),
+            "lon_key": cell_keys(longitude[valid], precision),
+            "block": (hours[valid] // hour_block).astype(np.int64),
+            "type_code": categories.codes[valid].astype(np.int64),
+            "count": np.ones(len(dates), dtype=np.int64),
+            "recent": 0.5 ** ((reference - dates) / DAY_NS / half_life_days),
+        })
+        return cls(
+            cls._sum(entries), categories.categories, reference,
+            precision, hour_block, half_life_days,
+        )
+
+    @staticmethod
+    def _sum(entries):
+        keys = ["lat_key", "lon_key", "block", "type_code"]
+        return entries.groupby(keys, sort=True, as_index=False)[["count", "recent"]].sum()
+
+    def merge(self, other):
+        """Model over the incidents of both (same cells and blocks; e.g. history + delta)."""
+        crime_types = self.crime_types.append(
+            other.crime_types.difference(self.crime_types, sort=False)
+        )
+        reference = max(self.reference, other.reference)
+
+        parts = []
+        for model in (self, other):
+            # Move the recency weights to the common (later) reference date
+            decay = 0.5 ** ((reference - model.reference) / DAY_NS / model.half_life_days)
+            remap = crime_types.get_indexer(model.crime_types)
+            parts.append(model.entries.assign(
+                type_code=remap[model.entries["type_code"].to_numpy()],
+                recent=model.entries["recent"] * decay,
+            ))
+        return PatrolModel(
+            self._sum(pd.concat(parts, ignore_index=True)), crime_types, reference,
+            self.precision, self.hour_block, self.half_life_days,
+        )
+
+    # ---------------------------
+    # Scoring
+    # ---------------------------
+    def severity_weights(self, severity=None):
+        """Severity per crime type (DEFAULT_SEVERITY overridden by `severity`)."""
+        weights = {**DEFAULT_SEVERITY, **(severity or {})}
+        return pd.Series(
+            [float(weights.get(crime_type, 1)) for crime_type in self.crime_types],
+            index=pd.Index(self.crime_types, name="Crime Type"), name="Severity",
+        )
+
+    def window_label(self, block):
+        start = block * self.hour_block
+        return f"{start:02d}:00–{min(start + self.hour_block, 24):02d}:00"
+
+    def recommend(self, k=TOP_RECOMMENDATIONS, budget=PATROL_UNITS, severity=None, recency=0.5):
+        """
+        The k highest-scoring cell × hour-block windows, best first, with their
+        dominant crime type and patrol units allocated from `budget`.
+        """
+        entries = self.entries
+        columns = ["Latitude", "Longitude", "Time Window", "Dominant Crime Type",
+                   "Incidents", "Score", "Patrol Units"]
+        if entries.empty:
+            return pd.DataFrame(columns=columns)
+
+        weights = self.severity_weights(severity).to_numpy()
+        counts = entries["count"].to_numpy()
+        entry_scores = weights[entries["type_code"].to_numpy()] * (
+            (1 - recency) * counts + recency * entries["recent"].to_numpy()
+        )
+
+        # Windows are contiguous runs of the (sorted) entries
+        lat_key = entries["lat_key"].to_numpy()
+        lon_key = entries["lon_key"].to_numpy()
+        block = entries["block"].to_numpy()
+        starts = np.flatnonzero(np.r_[
+            True, (lat_key[1:] != lat_key[:-1]) | (lon_key[1:] != lon_key[:-1])
+            | (block[1:] != block[:-1])
+        ])
+        ends = np.r_[starts[1:], len(entries)]
+        scores = np.add.reduceat(entry_scores, starts)
+
+        top = np.argsort(-scores, kind="stable")[:k]
+
+        # Dominant type: the entry with the largest score inside each top window
+        dominant = [
+            entries["type_code"].iat[starts[w] + np.argmax(entry_scores[starts[w]:ends[w]])]
+            for w in top
+        ]
+
+        scale = 10**self.precision
+        return pd.DataFrame({
+            "Latitude": lat_key[starts[top]] / scale,
+            "Longitude": lon_key[starts[top]] / scale,
+            "Time Window": [self.window_label(b) for b in block[starts[top]]],
+            "Dominant Crime Type": self.crime_types.take(dominant),
+            "Incidents": np.add.reduceat(counts, starts)[top],
+            "Score": scores[top].round(2),
+            "Patrol Units": allocate_units(scores[top], budget),
+        }, index=pd.RangeIndex(1, len(top) + 1, name="Rank"))
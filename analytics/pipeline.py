@@ -0,0 +1,303 @@
+"""
+Page computations as plain functions of a loaded frame.
+
+The Streamlit pages and the headless precompute job call these same functions,
+so precomputed artifacts are exactly what a page would have computed live.
+"""
+
+import pandas as pd
+
+from analytics.clustering import fit_kmeans
+from analytics.crosstab import Crosstab
+from analytics.data import iter_dataset
+from analytics.hotspots import HOTSPOT_RADIUS_M, Hotspots
+from analytics.patrol import PatrolModel
+from analytics.profile import DatasetProfile
+from analytics.reduction import (
+    accumulate_stats, fit_pca, iter_chunks, merge_stats, pca_from_stats, project,
+)
+from analytics.sampling import stratified_sample_index
+from analytics.sketch import DEFAULT_ERROR, DistinctCounter
+from analytics.spatial import DensityFrames, SpatialGrid, density_grid, merge_density_grids
+from analytics.temporal import TemporalCube
+
+# ---------------------------
+# Overview
+# ---------------------------
+def overview_columns(columns):
+    """(crime type column, location column); None where not found."""
+    crime_col = None
+    location_col = None
+
+    for col in columns:
+        if "primary" in col and "type" in col:
+            crime_col = col
+        if "location" in col:
+            location_col = col
+
+    return crime_col, location_col
+
+
+def overview_counts(df, crime_col, location_col, error=DEFAULT_ERROR):
+    """
+    Row count, incidents per crime type (few, counted exactly) and a
+    DistinctCounter of locations (exact while small, HyperLogLog beyond).
+    """
+    crime_types = df[crime_col].value_counts()
+    return {
+        "rows": len(df),
+        # Categorical columns also list categories absent from these rows
+        "crime_types": crime_types[crime_types > 0],
+        "locations": DistinctCounter.from_values(df[location_col], error),
+    }
+
+
+def stream_overview_counts(path, crime_col, location_col, error=DEFAULT_ERROR):
+    """overview_counts in one pass over the dataset, a chunk at a time."""
+    counts = None
+    for chunk in iter_dataset(path, [crime_col, location_col]):
+        chunk_counts = overview_counts(chunk, crime_col, location_col, error)
+        counts = chunk_counts if counts is None else merge_overview_counts(counts, chunk_counts)
+    return counts
+
+
+def _add_counts(a, b):
+    # Keep value_counts' most-frequent-first order
+    return (
+        a.add(b, fill_value=0).astype("int64")
+        .sort_values(ascending=False, kind="stable")
+    )
+
+
+def merge_overview_counts(a, b):
+    return {
+        "rows": a["rows"] + b["rows"],
+        "crime_types": _add_counts(a["crime_types"], b["crime_types"]),
+        "locations": a["locations"].merge(b["locations"]),
+    }
+
+
+# ---------------------------
+# Geographic Map
+# ---------------------------
+LOCATION_COLUMNS = ["location", "district", "beat", "ward", "area"]
+MAP_COLUMNS = ["primary type", "primary_type", "latitude", "longitude", *LOCATION_COLUMNS]
+MAP_ZOOM_LEVELS = range(8, 16)
+FRAME_COLUMNS = ["primary type", "primary_type", "latitude", "longitude", "date", "hour"]
+SAMPLE_PER_CATEGORY = 300
+
+
+def map_category_column(columns):
+    for col in ("primary type", "primary_type"):
+        if col in columns:
+            return col
+    return None
+
+
+def clean_coordinates(df, category_col):
+    """Numeric latitude / longitude; rows missing a position or category dropped."""
+    df = df.copy(deep=False)
+    df["latitude"] = pd.to_numeric(df["latitude"], errors="coerce")
+    df["longitude"] = pd.to_numeric(df["longitude"], errors="coerce")
+    return df.dropna(subset=["latitude", "longitude", category_col])
+
+
+def build_spatial_grid(df, category_col):
+    return SpatialGrid.from_frame(df, category_col)
+
+
+def build_density_grid(df, zoom):
+    return density_grid(df["latitude"], df["longitude"], zoom=zoom)
+
+
+def balanced_sample_index(df, category_col, n_per_group=SAMPLE_PER_CATEGORY):
+    return stratified_sample_index(df[category_col], n_per_group=n_per_group, seed=42)
+
+
+def build_density_frames(df, zoom):
+    """Weekday × hour density grids of cleaned incidents (needs a date column)."""
+    dates = pd.to_datetime(df["date"])
+    hours = df["hour"] if "hour" in df.columns else dates.dt.hour
+    return DensityFrames.from_arrays(
+        df["latitude"], df["longitude"], dates.dt.dayofweek, pd.to_numeric(hours), zoom=zoom
+    )
+
+
+def build_patrol_model(df, category_col):
+    """Cell × hour block × crime type counts of cleaned incidents (needs a date column)."""
+    dates = pd.to_datetime(df["date"])
+    hours = df["hour"] if "hour" in df.columns else dates.dt.hour
+    return PatrolModel.from_arrays(
+        df["latitude"], df["longitude"], dates, pd.to_numeric(hours), df[category_col]
+    )
+
+
+def build_hotspots(df, category_col, radius_m=HOTSPOT_RADIUS_M):
+    return Hotspots.detect(df["latitude"], df["longitude"], df[category_col], radius_m)
+
+
+# ---------------------------
+# Temporal Analysis
+# ---------------------------
+TEMPORAL_COLUMNS = ["date", "hour", "primary type", "district"]
+
+
+def build_temporal_cube(df):
+    return TemporalCube.from_frame(
+        df,
+        category_col="primary type" if "primary type" in df.columns else None,
+        district_col="district" if "district" in df.columns else None
+    )
+
+
+# ---------------------------
+# Dimensionality / Clustering
+# ---------------------------
+CRIME_COLUMN = "primary type"
+
+# Numeric columns that label or position an incident rather than describe it
+IDENTIFIER_COLUMNS = ("id", "case number")
+COORDINATE_COLUMNS = ("latitude", "longitude", "x coordinate", "y coordinate")
+
+
+def is_feature(name, dtype):
+    """Whether a column is a clustering feature: numeric, not an ID or coordinate."""
+    return (
+        pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+        and name not in IDENTIFIER_COLUMNS and name not in COORDINATE_COLUMNS
+    )
+
+
+def feature_columns(df):
+    return [name for name, dtype in df.dtypes.items() if is_feature(name, dtype)]
+
+
+def feature_matrix(df, columns=None):
+    """
+    Feature columns as a float64 matrix (the PCA / KMeans input). Pass
+    `columns` to reproduce another frame's feature set, e.g. for appended
+    rows or the manifest's features.
+    """
+    if columns is None:
+        return df[feature_columns(df)].to_numpy(dtype=float)
+    return df.reindex(columns=columns).apply(pd.to_numeric, errors="coerce").to_numpy(float)
+
+
+def feature_stats(df):
+    """Feature columns and their running mean / scatter (MomentStats)."""
+    columns = feature_columns(df)
+    return {
+        "columns": columns,
+        "stats": accumulate_stats(iter_chunks(feature_matrix(df, columns))),
+    }
+
+
+def build_pca_basis(X, columns):
+    """PCA basis of the feature matrix X, labelled with its feature columns."""
+    return fit_pca(X)._replace(columns=list(columns))
+
+
+def pca_basis_from_stats(features):
+    """PCA basis from feature_stats() (e.g. merged over chunks or appends)."""
+    return pca_from_stats(features["stats"])._replace(columns=list(features["columns"]))
+
+
+def fitted_on(artifact_columns, columns):
+    """Whether an artifact was computed from exactly these feature columns."""
+    return artifact_columns is not None and list(artifact_columns) == list(columns)
+
+
+def pca_projection(X, basis, n_components):
+    return project(X, basis, n_components)
+
+
+def cluster_labels(X_pca, n_clusters, seed=42):
+    """(labels, centroids) of KMeans on the projected features."""
+    return fit_kmeans(X_pca, n_clusters, seed=seed, n_jobs=-1)
+
+
+def crime_cluster_table(df, labels, crime_column=CRIME_COLUMN):
+    """Crime type count per cluster (a clusters × crime types Crosstab)."""
+    return Crosstab.from_arrays(labels, df[crime_column], "Cluster", crime_column)
+
+
+# ---------------------------
+# Mergeable aggregates (appends and chunked ingestion)
+# ---------------------------
+def chunk_aggregates(df, feature_cols):
+    """
+    Every artifact that can be built from a slice of rows and merged later,
+    keyed by artifact name. feature_cols fixes the feature set so slices
+    agree with the full dataset.
+    """
+    aggregates = {}
+
+    crime_col, location_col = overview_columns(df.columns)
+    if crime_col and location_col:
+        aggregates["overview_counts"] = overview_counts(df, crime_col, location_col)
+
+    category_col = map_category_column(df.columns)
+    if category_col and {"latitude", "longitude"} <= set(df.columns):
+        geo = clean_coordinates(df, category_col)
+        aggregates["spatial_grid"] = build_spatial_grid(geo, category_col)
+        for zoom in MAP_ZOOM_LEVELS:
+            aggregates[density_grid_artifact(zoom)] = build_density_grid(geo, zoom)
+            if "date" in geo.columns:
+                aggregates[density_frames_artifact(zoom)] = build_density_frames(geo, zoom)
+        if "date" in geo.columns:
+            aggregates["patrol_model"] = build_patrol_model(geo, category_col)
+
+    if "date" in df.columns:
+        aggregates["temporal_cube"] = build_temporal_cube(df)
+
+    aggregates["feature_stats"] = {
+        "columns": feature_cols,
+        "stats": accumulate_stats(iter_chunks(feature_matrix(df, feature_cols))),
+    }
+    # Column statistics behind the dataset manifest
+    aggregates["dataset_profile"] = DatasetProfile.from_frame(df)
+    return aggregates
+
+
+def merge_aggregate(name, a, b):
+    """Combine two chunk_aggregates() values of the same artifact."""
+    if name == "overview_counts":
+        return merge_overview_counts(a, b)
+    if name == "feature_stats":
+        return {"columns": a["columns"], "stats": merge_stats(a["stats"], b["stats"])}
+    if name.startswith("density_grid_"):
+        return merge_density_grids(a, b)
+    # SpatialGrid / TemporalCube / DensityFrames / PatrolModel / DatasetProfile
+    return a.merge(b)
+
+
+# ---------------------------
+# Artifact names (shared by pages and the precompute job)
+# ---------------------------
+def density_grid_artifact(zoom):
+    return f"density_grid_z{zoom}"
+
+
+def density_frames_artifact(zoom):
+    return f"density_frames_z{zoom}"
+
+
+def balanced_sample_artifact(n_per_group):
+    return f"balanced_sample_{n_per_group}"
+
+
+def hotspots_artifact(radius_m):
+    return f"hotspots_r{radius_m}"
+
+
+def clusters_artifact(n_components, n_clusters):
+    return f"clusters_c{n_components}_k{n_clusters}"
+
+
+def umap_artifact(n_components, n_neighbors, min_dist, pca_init):
+    init = "pca" if pca_init else "spectral"
+    return f"umap_c{n_components}_n{n_neighbors}_d{min_dist:g}_{init}"
+
+
+def crime_cluster_table_artifact(n_components, n_clusters):
+    return f"crime_cluster_table_c{n_components}_k{n_clusters}"
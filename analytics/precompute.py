@@ -0,0 +1,202 @@
+"""
+Headless precompute job: materialize every page's results ahead of time.
+
+    python -m analytics.precompute [--ingest] [--components 2 3] [--clusters 4 5]
+
+Runs the same analytics.pipeline functions as the pages, outside Streamlit,
+in a process pool (overview, manifest, map, temporal and PCA work in parallel;
+clustering starts as soon as the PCA basis exists). Artifacts are written per dataset version;
+pages use them when present and compute live otherwise.
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from analytics import pipeline
+from analytics.artifacts import load_artifact, prune_artifacts, save_artifact
+from analytics.data import DATA_PATH, dataset_columns, dataset_version, read_dataset
+from analytics.hotspots import HOTSPOT_RADII_M
+from analytics.ingest import convert_to_parquet
+from analytics.manifest import stream_profile, write_manifest
+
+
+# ---------------------------
+# Tasks (top-level so they can run in worker processes)
+# ---------------------------
+def overview_task(path, version):
+    crime_col, location_col = pipeline.overview_columns(
+        dataset_columns(path)
+    )
+    if crime_col is None or location_col is None:
+        return []
+
+    return [save_artifact(
+        pipeline.stream_overview_counts(path, crime_col, location_col),
+        "overview_counts", version
+    )]
+
+
+def manifest_task(path, version):
+    # Reuses the column profile stored by `ingest` when there is one
+    profile = load_artifact("dataset_profile", version)
+    written = []
+    if profile is None:
+        profile = stream_profile(path)
+        written.append(save_artifact(profile, "dataset_profile", version))
+    return written + [write_manifest(profile, path, version)]
+
+
+def map_task(path, version):
+    df = read_dataset(path, pipeline.MAP_COLUMNS)
+    category_col = pipeline.map_category_column(df.columns)
+    if category_col is None or not {"latitude", "longitude"} <= set(df.columns):
+        return []
+
+    df = pipeline.clean_coordinates(df, category_col)
+    written = [
+        save_artifact(pipeline.build_spatial_grid(df, category_col), "spatial_grid", version),
+        save_artifact(
+            pipeline.balanced_sample_index(df, category_col),
+            pipeline.balanced_sample_artifact(pipeline.SAMPLE_PER_CATEGORY),
+            version,
+        ),
+    ]
+    for zoom in pipeline.MAP_ZOOM_LEVELS:
+        written.append(save_artifact(
+            pipeline.build_density_grid(df, zoom),
+            pipeline.density_grid_artifact(zoom),
+            version,
+        ))
+    for radius_m in HOTSPOT_RADII_M:
+        written.append(save_artifact(
+            pipeline.build_hotspots(df, category_col, radius_m),
+            pipeline.hotspots_artifact(radius_m),
+            version,
+        ))
+    return written
+
+
+def frames_task(path, version):
+    # Map results over time: heatmap frames and the patrol model
+    df = read_dataset(path, pipeline.FRAME_COLUMNS)
+    category_col = pipeline.map_category_column(df.columns)
+    if category_col is None or not {"latitude", "longitude", "date"} <= set(df.columns):
+        return []
+
+    df = pipeline.clean_coordinates(df, category_col)
+    written = [
+        save_artifact(pipeline.build_patrol_model(df, category_col), "patrol_model", version)
+    ]
+    for zoom in pipeline.MAP_ZOOM_LEVELS:
+        written.append(save_artifact(
+            pipeline.build_density_frames(df, zoom),
+            pipeline.density_frames_artifact(zoom),
+            version,
+        ))
+    return written
+
+
+def temporal_task(path, version):
+    df = read_dataset(path, pipeline.TEMPORAL_COLUMNS)
+    return [save_artifact(pipeline.build_temporal_cube(df), "temporal_cube", version)]
+
+
+def pca_task(path, version):
+    df = read_dataset(path)
+    columns = pipeline.feature_columns(df)
+    X = pipeline.feature_matrix(df, columns)
+    return [
+        save_artifact(pipeline.build_pca_basis(X, columns), "pca_basis", version),
+        # Running mean / scatter, kept up to date by `ingest --append`
+        save_artifact(pipeline.feature_stats(df), "feature_stats", version),
+    ]
+
+
+def cluster_task(path, version, n_components, n_clusters):
+    df = read_dataset(path)
+    basis = load_artifact("pca_basis", version)
+    X = pipeline.feature_matrix(df, basis.columns)
+
+    X_pca = pipeline.pca_projection(X, basis, n_components)
+    labels, centroids = pipeline.cluster_labels(X_pca, n_clusters)
+    # Stored with the basis the centroids live in (and its feature columns)
+    written = [save_artifact(
+        (labels, centroids, basis),
+        pipeline.clusters_artifact(n_components, n_clusters),
+        version,
+    )]
+    if pipeline.CRIME_COLUMN in df.columns:
+        written.append(save_artifact(
+            pipeline.crime_cluster_table(df, labels),
+            pipeline.crime_cluster_table_artifact(n_components, n_clusters),
+            version,
+        ))
+    return written
+
+
+# ---------------------------
+# Driver
+# ---------------------------
+def precompute(path=DATA_PATH, components=(2,), clusters=(4,), workers=None):
+    """Run every task for the current dataset version; returns written paths."""
+    path = str(path)
+    version = dataset_version(path)
+    written = []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pca_future = pool.submit(pca_task, path, version)
+        pending = {
+            pool.submit(overview_task, path, version),
+            pool.submit(manifest_task, path, version),
+            pool.submit(map_task, path, version),
+            pool.submit(frames_task, path, version),
+            pool.submit(temporal_task, path, version),
+            pca_future,
+        }
+
+        while pending:
+            future = next(as_completed(pending))
+            pending.remove(future)
+            written.extend(future.result())
+
+            if future is pca_future:
+                pending.update(
+                    pool.submit(cluster_task, path, version, n_components, n_clusters)
+                    for n_components in components
+                    for n_clusters in clusters
+                )
+
+    return version, written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", default=str(DATA_PATH), help="crime CSV path")
+    parser.add_argument("--ingest", action="store_true",
+                        help="convert the CSV to Parquet first")
+    parser.add_argument("--components", type=int, nargs="+", default=[2])
+    parser.add_argument("--clusters", type=int, nargs="+", default=[4])
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--prune", action="store_true",
+                        help="delete artifacts of older dataset versions")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.ingest:
+        print(f"Wrote {convert_to_parquet(args.data)}")
+
+    version, written = precompute(args.data, args.components, args.clusters, args.workers)
+    for path in written:
+        print(f"Wrote {path}")
+
+    if args.prune:
+        prune_artifacts(version)
+    print(f"Precomputed {len(written)} artifacts for version {version} "
+          f"in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Mergeable per-column statistics of the dataset (the dataset manifest's source).
+
+For every column: dtype, row and null counts, min / max and a running sum
+for the mean (numeric and date columns), and a DistinctCounter (exact while
+small, HyperLogLog beyond). Every statistic combines across slices of rows,
+so a profile is built per chunk at ingestion and kept current on append.
+"""
+
+import numpy as np
+import pandas as pd
+
+from analytics.sketch import DEFAULT_ERROR, DistinctCounter
+
+
+def _has_range(dtype):
+    # Columns with a meaningful min / max (bools and strings have none)
+    return (
+        pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+    ) or pd.api.types.is_datetime64_any_dtype(dtype)
+
+
+def _merge_dtype(a, b):
+    # int64 in one chunk, float64 (NaN present) in another -> float64
+    if a == b:
+        return a
+    try:
+        return np.result_type(a, b)
+    except TypeError:
+        return np.dtype(object)
+
+
+def _scalar(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class ColumnProfile:
+    """Statistics of one column."""
+
+    def __init__(self, dtype, rows=0, nulls=0, minimum=None, maximum=None, total=0.0,
+                 distinct=None):
+        self.dtype = dtype
+        self.rows = rows
+        self.nulls = nulls
+        self.minimum = minimum
+        self.maximum = maximum
+        self.total = total
+        self.distinct = distinct if distinct is not None else DistinctCounter()
+
+    @classmethod
+    def from_values(cls, values, error=DEFAULT_ERROR):
+        present = values.dropna()
+        profile = cls(
+            values.dtype, len(values), len(values) - len(present),
+            distinct=DistinctCounter.from_values(present, error),
+        )
+        if _has_range(values.dtype) and len(present):
+            profile.minimum = _scalar(present.min())
+            profile.maximum = _scalar(present.max())
+            if pd.api.types.is_numeric_dtype(values.dtype):
+                profile.total = float(present.sum())
+        return profile
+
+    def merge(self, other):
+        bounds = [p for p in (self, other) if p.minimum is not None]
+        return ColumnProfile(
+            _merge_dtype(self.dtype, other.dtype),
+            self.rows + other.rows,
+            self.nulls + other.nulls,
+            min(p.minimum for p in bounds) if bounds else None,
+            max(p.maximum for p in bounds) if bounds else None,
+            self.total + other.total,
+            self.distinct.merge(other.distinct),
+        )
+
+    # ---------------------------
+    # Queries
+    # ---------------------------
+    @property
+    def mean(self):
+        """Mean of a numeric column (None for other dtypes or no values)."""
+        present = self.rows - self.nulls
+        if not present or not pd.api.types.is_numeric_dtype(self.dtype) or self.minimum is None:
+            return None
+        return self.total / present
+
+    def summary(self):
+        """JSON-ready statistics (dates as ISO strings)."""
+        def plain(value):
+            return value.isoformat() if isinstance(value, pd.Timestamp) else value
+
+        return {
+            "dtype": str(self.dtype),
+            "nulls": self.nulls,
+            "min": plain(self.minimum),
+            "max": plain(self.maximum),
+            "mean": self.mean,
+            # A HyperLogLog estimate can overshoot the values it has seen
+            "distinct": min(self.distinct.count(), self.rows - self.nulls),
+            "distinct_error": self.distinct.relative_error,
+        }
+
+
+class DatasetProfile:
+    """ColumnProfile per column, in dataset column order."""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    @classmethod
+    def from_frame(cls, df, error=DEFAULT_ERROR):
+        return cls({name: ColumnProfile.from_values(values, error) for name, values in df.items()})
+
+    def merge(self, other):
+        """Profile of the rows of both (e.g. history + delta)."""
+        columns = dict(self.columns)
+        for name, profile in other.columns.items():
+            columns[name] = columns[name].merge(profile) if name in columns else profile
+        return DatasetProfile(columns)
+
+    # ---------------------------
+    # Queries
+    # ---------------------------
+    @property
+    def rows(self):
+        return max((profile.rows for profile in self.columns.values()), default=0)
+
+    def dtypes(self):
+        return pd.Series({name: profile.dtype for name, profile in self.columns.items()},
+                         dtype=object)
+
+    def summary(self):
+        return {name: profile.summary() for name, profile in self.columns.items()}
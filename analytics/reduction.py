@@ -0,0 +1,168 @@
+"""
+PCA for the clustering page without a full SVD of the standardized matrix.
+
+Two fitting modes:
+  * "incremental" – one chunked pass accumulating mean / scatter statistics
+    (merged pairwise, so chunks can come from disk), then an eigendecomposition
+    of the small d × d standardized covariance. Exact, memory bounded by chunk.
+  * "randomized" – randomized truncated SVD (range finder + power iterations)
+    of the standardized matrix for when only a few components of a wide
+    matrix are needed.
+
+Both return a PCABasis holding every fitted component, so choosing a different
+number of components is just a projection, not a refit.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+CHUNK_SIZE = 262_144
+
+# "auto" uses randomized SVD only for matrices at least this wide
+RANDOMIZED_MIN_FEATURES = 100
+
+# columns: names of the features the basis was fitted on (None when unknown,
+# e.g. a basis stored before it was recorded)
+PCABasis = namedtuple(
+    "PCABasis", ["n_rows", "mean", "scale", "components", "explained_variance_ratio", "columns"],
+    defaults=(None,),
+)
+
+# Count, column means and centered scatter matrix Σ(x − mean)(x − mean)ᵀ
+MomentStats = namedtuple("MomentStats", ["n_rows", "mean", "scatter"])
+
+
+# ---------------------------
+# Streaming moment statistics
+# ---------------------------
+def moment_stats(X):
+    """MomentStats of one block of rows."""
+    X = np.asarray(X, dtype=float)
+    mean = X.mean(axis=0)
+    centered = X - mean
+    return MomentStats(len(X), mean, centered.T @ centered)
+
+
+def merge_stats(a, b):
+    """Combine the MomentStats of two disjoint blocks (Chan et al.)."""
+    if a is None or a.n_rows == 0:
+        return b
+    if b is None or b.n_rows == 0:
+        return a
+
+    n_rows = a.n_rows + b.n_rows
+    delta = b.mean - a.mean
+    mean = a.mean + delta * (b.n_rows / n_rows)
+    scatter = a.scatter + b.scatter + np.outer(delta, delta) * (a.n_rows * b.n_rows / n_rows)
+    return MomentStats(n_rows, mean, scatter)
+
+
+def iter_chunks(X, chunk_size=CHUNK_SIZE):
+    for start in range(0, len(X), chunk_size):
+        yield X[start:start + chunk_size]
+
+
+def accumulate_stats(chunks):
+    """MomentStats over an iterable of row blocks (arrays or DataFrames)."""
+    stats = None
+    for chunk in chunks:
+        if len(chunk):
+            stats = merge_stats(stats, moment_stats(chunk))
+    return stats
+
+
+def standard_scale(stats):
+    """Population std (ddof=0) per column, with 1.0 for constant columns."""
+    std = np.sqrt(np.diag(stats.scatter) / stats.n_rows)
+    return np.where(std > 0, std, 1.0)
+
+
+# ---------------------------
+# Fitting
+# ---------------------------
+def _flip_signs(components):
+    # Deterministic orientation: largest loading of each component is positive
+    largest = np.abs(components).argmax(axis=1)
+    signs = np.sign(components[np.arange(len(components)), largest])
+    signs[signs == 0] = 1.0
+    return components * signs[:, None]
+
+
+def pca_from_stats(stats, n_components=None):
+    """Exact PCA basis of the standardized data from its MomentStats."""
+    scale = standard_scale(stats)
+    covariance = stats.scatter / np.outer(scale, scale)
+
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    order = np.argsort(eigenvalues)[::-1]
+    eigenvalues = np.clip(eigenvalues[order], 0.0, None)
+    components = eigenvectors[:, order].T
+
+    ratio = eigenvalues / eigenvalues.sum()
+    if n_components is not None:
+        components = components[:n_components]
+        ratio = ratio[:n_components]
+    return PCABasis(stats.n_rows, stats.mean, scale, _flip_signs(components), ratio)
+
+
+def randomized_svd(A, n_components, n_oversamples=10, n_iter=4, seed=42):
+    """Top singular values / right singular vectors of A (Halko et al.)."""
+    rng = np.random.default_rng(seed)
+    rank = min(n_components + n_oversamples, *A.shape)
+
+    Q = A @ rng.standard_normal((A.shape[1], rank))
+    for _ in range(n_iter):
+        Q, _ = np.linalg.qr(Q)
+        Q, _ = np.linalg.qr(A.T @ Q)
+        Q = A @ Q
+    Q, _ = np.linalg.qr(Q)
+
+    _, S, Vt = np.linalg.svd(Q.T @ A, full_matrices=False)
+    return S[:n_components], Vt[:n_components]
+
+
+def randomized_pca(X, n_components, seed=42):
+    """PCA basis of the standardized X via randomized truncated SVD."""
+    X = np.asarray(X, dtype=float)
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale = np.where(scale > 0, scale, 1.0)
+    X_scaled = (X - mean) / scale
+
+    S, Vt = randomized_svd(X_scaled, n_components, seed=seed)
+    ratio = S**2 / np.einsum("ij,ij->", X_scaled, X_scaled)
+    return PCABasis(len(X), mean, scale, _flip_signs(Vt), ratio)
+
+
+def fit_pca(X, n_components=None, method="auto", chunk_size=CHUNK_SIZE, seed=42):
+    """
+    Fit a PCABasis on standardized data.
+
+    X is an array, or (for method="incremental") any iterable of row blocks.
+    n_components=None keeps every component.
+    """
+    if method == "auto":
+        wide = np.ndim(X) == 2 and X.shape[1] >= RANDOMIZED_MIN_FEATURES
+        method = "randomized" if wide and n_components else "incremental"
+
+    if method == "randomized":
+        return randomized_pca(X, n_components, seed=seed)
+
+    chunks = iter_chunks(X, chunk_size) if hasattr(X, "shape") else X
+    return pca_from_stats(accumulate_stats(chunks), n_components)
+
+
+# ---------------------------
+# Projection
+# ---------------------------
+def project(X, basis, n_components, chunk_size=CHUNK_SIZE):
+    """Standardize X with the basis' statistics and project onto n components."""
+    X = np.asarray(X)
+    components = basis.components[:n_components].T
+    out = np.empty((len(X), components.shape[1]))
+
+    for start in range(0, len(X), chunk_size):
+        block = (X[start:start + chunk_size] - basis.mean) / basis.scale
+        out[start:start + chunk_size] = block @ components
+    return out
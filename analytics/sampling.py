@@ -0,0 +1,51 @@
+"""
+Stratified sampling without a Python call per group.
+
+Every row gets a random key in [0, 1); sorting by group code + key orders rows
+by group and randomly inside each group. Rows are ranked inside their group and
+kept while the rank is below the group's quota: one argsort and a few
+vectorized passes regardless of the number of groups.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def stratified_sample_index(groups, n_per_group=None, fraction=None, seed=42):
+    """
+    Row positions (sorted) of a stratified random sample.
+
+    Give either `n_per_group` (fixed quota, capped at the group size) or
+    `fraction` (proportional quota, at least one row per non-empty group).
+    Rows whose group is missing are never sampled. The same seed always
+    selects the same rows.
+    """
+    if (n_per_group is None) == (fraction is None):
+        raise ValueError("Pass exactly one of n_per_group or fraction")
+
+    if not isinstance(groups, (pd.Series, pd.Index, pd.Categorical)):
+        groups = np.asarray(groups)
+    codes, uniques = pd.factorize(groups, use_na_sentinel=True)
+    rng = np.random.default_rng(seed)
+    keys = rng.random(len(codes))
+
+    valid = np.flatnonzero(codes >= 0)
+    order = valid[np.argsort(codes[valid] + keys[valid])]
+    sorted_codes = codes[order]
+
+    sizes = np.bincount(sorted_codes, minlength=len(uniques))
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    ranks = np.arange(len(order)) - starts[sorted_codes]
+
+    if n_per_group is not None:
+        quotas = np.minimum(sizes, n_per_group)
+    else:
+        quotas = np.minimum(sizes, np.maximum(np.round(sizes * fraction), 1))
+
+    return np.sort(order[ranks < quotas[sorted_codes]])
+
+
+def stratified_sample(df, group_col, n_per_group=None, fraction=None, seed=42):
+    """DataFrame version of stratified_sample_index."""
+    index = stratified_sample_index(df[group_col], n_per_group, fraction, seed)
+    return df.iloc[index]
@@ -0,0 +1,127 @@
+"""
+Mergeable distinct counter for high-cardinality columns (e.g. `location`).
+
+Values are hashed to 64 bits. Up to `exact_limit` distinct hashes the
+counter keeps them all and the count is exact; past that it folds them into
+a HyperLogLog sketch whose register count is picked from the requested
+relative error (1.04 / sqrt(registers)). Either form merges with the other,
+so counts can be built per chunk and kept current on append.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ERROR = 0.01
+EXACT_LIMIT = 50_000
+# Precision 11..18 -> 2 KB..256 KB of registers, ~2.3 %..0.2 % error
+MIN_PRECISION, MAX_PRECISION = 11, 18
+
+
+def hash_values(values):
+    """Stable (process-independent) 64-bit hashes of the non-null values."""
+    values = pd.Series(values).dropna()
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.util.hash_array(values.to_numpy("datetime64[ns]").view(np.int64))
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        # Hashed as float64, so an int chunk and a float (NaN) chunk agree
+        return pd.util.hash_array(values.to_numpy(dtype=float))
+    return pd.util.hash_array(values.to_numpy(dtype=object))
+
+
+def precision_for_error(error):
+    registers = (1.04 / error) ** 2
+    return min(max(math.ceil(math.log2(registers)), MIN_PRECISION), MAX_PRECISION)
+
+
+class DistinctCounter:
+    """Exact distinct count while small, HyperLogLog estimate once large."""
+
+    def __init__(self, error=DEFAULT_ERROR, exact_limit=EXACT_LIMIT):
+        self.precision = precision_for_error(error)
+        self.exact_limit = exact_limit
+        self.hashes = np.empty(0, dtype=np.uint64)  # sorted, unique; None once sketched
+        self.registers = None
+
+    @classmethod
+    def from_values(cls, values, error=DEFAULT_ERROR, exact_limit=EXACT_LIMIT):
+        return cls(error, exact_limit).update(values)
+
+    @property
+    def is_exact(self):
+        return self.registers is None
+
+    @property
+    def relative_error(self):
+        return 0.0 if self.is_exact else 1.04 / math.sqrt(1 << self.precision)
+
+    # ---------------------------
+    # Building & merging
+    # ---------------------------
+    def update(self, values):
+        """Add a batch of raw values; returns self."""
+        return self._add_hashes(hash_values(values))
+
+    def merge(self, other):
+        """Counter over the values of both (same precision required)."""
+        if other.precision != self.precision:
+            raise ValueError(
+                f"Cannot merge sketches of precision {self.precision} and {other.precision}"
+            )
+        merged = DistinctCounter.__new__(DistinctCounter)
+        merged.precision = self.precision
+        merged.exact_limit = self.exact_limit
+        merged.hashes = self.hashes
+        merged.registers = None if self.registers is None else self.registers.copy()
+
+        if other.is_exact:
+            return merged._add_hashes(other.hashes)
+        merged._sketch()
+        np.maximum(merged.registers, other.registers, out=merged.registers)
+        return merged
+
+    def _add_hashes(self, hashes):
+        if self.is_exact:
+            self.hashes = np.union1d(self.hashes, hashes)
+            if len(self.hashes) > self.exact_limit:
+                self._sketch()
+        else:
+            self._fold(hashes)
+        return self
+
+    def _sketch(self):
+        """Switch from the exact hash set to HyperLogLog registers."""
+        if self.is_exact:
+            self.registers = np.zeros(1 << self.precision, dtype=np.uint8)
+            self._fold(self.hashes)
+            self.hashes = None
+
+    def _fold(self, hashes):
+        p = self.precision
+        bits = 64 - p
+        index = (hashes >> np.uint64(bits)).astype(np.intp)
+        rest = hashes & np.uint64((1 << bits) - 1)
+
+        # Rank = position of the leftmost 1 in the remaining `bits` bits;
+        # rest < 2**53 (p >= 11), so the float log2 is exact
+        rank = np.full(len(hashes), bits + 1, dtype=np.uint8)
+        nonzero = rest != 0
+        rank[nonzero] = bits - np.floor(np.log2(rest[nonzero].astype(float))).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    # ---------------------------
+    # Estimate
+    # ---------------------------
+    def count(self):
+        if self.is_exact:
+            return len(self.hashes)
+
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
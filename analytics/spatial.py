@@ -0,0 +1,281 @@
+"""
+Spatial grid index for the Geographic Map page.
+
+Incidents are binned once per dataset version at several rounding precisions
+(decimal places of latitude / longitude, like `round(4)`). Each level stores
+counts per cell and per cell × crime type, so hotspot queries are lookups on a
+small sorted table instead of groupbys and boolean filters over every row.
+"""
+
+import numpy as np
+import pandas as pd
+
+from analytics.temporal import DAY_NAMES
+
+# Decimal places indexed; 4 matches the original round(4) bins (~11 m)
+GRID_PRECISIONS = (2, 3, 4)
+
+
+def cell_keys(values, precision):
+    """Integer cell key; key / 10**precision equals values.round(precision)."""
+    return np.rint(np.asarray(values, dtype=float) * 10**precision).astype(np.int64)
+
+
+class SpatialGrid:
+    """Counts per grid cell and per cell × crime type at several precisions."""
+
+    def __init__(self, levels, crime_types):
+        # levels: precision -> (counts per cell, counts per cell × type code)
+        self.levels = levels
+        self.crime_types = crime_types
+
+    @classmethod
+    def from_arrays(cls, latitude, longitude, categories, precisions=GRID_PRECISIONS):
+        categories = pd.Categorical(categories)
+        levels = {}
+
+        for precision in precisions:
+            keys = pd.DataFrame({
+                "lat_key": cell_keys(latitude, precision),
+                "lon_key": cell_keys(longitude, precision),
+                "type_code": categories.codes,
+            })
+            by_type = keys.groupby(["lat_key", "lon_key", "type_code"]).size()
+            # Cell totals come from the (much smaller) per-type table
+            cells = by_type.groupby(level=["lat_key", "lon_key"]).sum()
+            levels[precision] = (cells, by_type)
+
+        return cls(levels, categories.categories)
+
+    @classmethod
+    def from_frame(cls, df, category_col, precisions=GRID_PRECISIONS):
+        return cls.from_arrays(df["latitude"], df["longitude"], df[category_col], precisions)
+
+    def merge(self, other):
+        """Grid over the incidents of both grids (e.g. history + appended delta)."""
+        new_types = other.crime_types.difference(self.crime_types, sort=False)
+        crime_types = self.crime_types.append(new_types)
+        remap = crime_types.get_indexer(other.crime_types)
+
+        levels = {}
+        for precision, (cells, by_type) in self.levels.items():
+            other_cells, other_by_type = other.levels[precision]
+            codes = other_by_type.index.levels[2].to_numpy()
+            other_by_type = other_by_type.set_axis(
+                other_by_type.index.set_levels(remap[codes], level="type_code")
+            )
+            levels[precision] = (
+                cells.add(other_cells, fill_value=0).astype(np.int64),
+                by_type.add(other_by_type, fill_value=0).astype(np.int64),
+            )
+        return SpatialGrid(levels, crime_types)
+
+    # ---------------------------
+    # Queries
+    # ---------------------------
+    def cell_counts(self, precision=4):
+        """Every non-empty cell as (lat_bin, lon_bin, crime_count)."""
+        cells, _ = self.levels[precision]
+        scale = 10**precision
+        return pd.DataFrame({
+            "lat_bin": cells.index.get_level_values("lat_key") / scale,
+            "lon_bin": cells.index.get_level_values("lon_key") / scale,
+            "crime_count": cells.to_numpy(),
+        })
+
+    def top_cells(self, n=10, precision=4):
+        """The n busiest cells, busiest first (ties keep grid order)."""
+        cells, _ = self.levels[precision]
+        top = cells.nlargest(n, keep="first")
+        scale = 10**precision
+        return pd.DataFrame({
+            "lat_bin": top.index.get_level_values("lat_key") / scale,
+            "lon_bin": top.index.get_level_values("lon_key") / scale,
+            "crime_count": top.to_numpy(),
+        })
+
+    def max_cell(self, precision=4):
+        """(lat_bin, lon_bin, crime_count) of the busiest cell."""
+        row = self.top_cells(1, precision).iloc[0]
+        return float(row["lat_bin"]), float(row["lon_bin"]), int(row["crime_count"])
+
+    def cell_crime_types(self, lat_bin, lon_bin, precision=4):
+        """Crime type counts inside one cell, most frequent first."""
+        _, by_type = self.levels[precision]
+        key = (cell_keys(lat_bin, precision).item(), cell_keys(lon_bin, precision).item())
+
+        try:
+            counts = by_type.loc[key]
+        except KeyError:
+            counts = by_type.iloc[:0].droplevel(["lat_key", "lon_key"])
+
+        counts = counts.sort_values(ascending=False, kind="stable")
+        return pd.DataFrame({
+            "Crime Type": self.crime_types.take(counts.index),
+            "Count": counts.to_numpy(),
+        })
+
+
+# ---------------------------
+# Heatmap density grid
+# ---------------------------
+# Grids with more cells than this are counted sparsely instead of densely
+MAX_DENSE_CELLS = 4_000_000
+
+
+def cell_size_degrees(zoom, cell_pixels=8):
+    """Width in degrees of a cell `cell_pixels` wide at a web-mercator zoom level."""
+    return 360.0 / (256 * 2**zoom) * cell_pixels
+
+
+def density_grid(latitude, longitude, zoom=11, cell_pixels=8):
+    """
+    Aggregate incidents into a weighted grid matched to the map zoom.
+
+    Returns one row per non-empty cell (cell centre latitude / longitude and
+    the number of incidents as `weight`), so the heatmap payload depends on
+    the covered area and zoom, not on the number of rows.
+    """
+    cell = cell_size_degrees(zoom, cell_pixels)
+    lat_idx = np.floor(np.asarray(latitude, dtype=float) / cell).astype(np.int64)
+    lon_idx = np.floor(np.asarray(longitude, dtype=float) / cell).astype(np.int64)
+
+    if len(lat_idx) == 0:
+        return pd.DataFrame({"latitude": [], "longitude": [], "weight": []})
+
+    lat_min, lon_min = lat_idx.min(), lon_idx.min()
+    n_lat = int(lat_idx.max() - lat_min) + 1
+    n_lon = int(lon_idx.max() - lon_min) + 1
+    flat = (lat_idx - lat_min) * n_lon + (lon_idx - lon_min)
+
+    if n_lat * n_lon <= MAX_DENSE_CELLS:
+        counts = np.bincount(flat, minlength=n_lat * n_lon)
+        cells = np.flatnonzero(counts)
+        counts = counts[cells]
+    else:
+        cells, counts = np.unique(flat, return_counts=True)
+
+    return pd.DataFrame({
+        "latitude": (cells // n_lon + lat_min + 0.5) * cell,
+        "longitude": (cells % n_lon + lon_min + 0.5) * cell,
+        "weight": counts,
+    })
+
+
+def merge_density_grids(a, b):
+    """Sum two density grids built at the same zoom (cell centres line up exactly)."""
+    merged = (
+        pd.concat([a, b], ignore_index=True)
+          .groupby(["latitude", "longitude"], as_index=False)["weight"]
+          .sum()
+    )
+    return merged
+
+
+# ---------------------------
+# Heatmap frames over time
+# ---------------------------
+HOURS = 24
+
+
+class DensityFrames:
+    """
+    One density grid (as density_grid) per weekday × hour, built in a single
+    pass: every incident gets a (frame, cell) key and the keys are counted
+    once. Cells are stored sparsely, sorted by frame, so frame f is rows
+    offsets[f]:offsets[f + 1] of (lat_idx, lon_idx, weight); stepping through
+    frames slices these arrays and never touches the incidents again.
+    """
+
+    def __init__(self, cell, labels, offsets, lat_idx, lon_idx, weights):
+        self.cell = cell
+        self.labels = labels
+        self.offsets = offsets
+        self.lat_idx = lat_idx
+        self.lon_idx = lon_idx
+        self.weights = weights
+
+    @classmethod
+    def from_arrays(cls, latitude, longitude, weekday, hour, zoom=11, cell_pixels=8):
+        latitude = np.asarray(latitude, dtype=float)
+        longitude = np.asarray(longitude, dtype=float)
+        weekday = np.asarray(weekday, dtype=float)
+        hour = np.asarray(hour, dtype=float)
+        valid = np.isfinite(latitude) & np.isfinite(longitude) & np.isfinite(weekday) & np.isfinite(hour)
+
+        cell = cell_size_degrees(zoom, cell_pixels)
+        labels = [f"{day} {h:02d}:00" for day in DAY_NAMES for h in range(HOURS)]
+        return cls._aggregate(
+            cell, labels,
+            (weekday[valid] * HOURS + hour[valid]).astype(np.int64),
+            np.floor(latitude[valid] / cell).astype(np.int64),
+            np.floor(longitude[valid] / cell).astype(np.int64),
+            np.ones(int(valid.sum()), dtype=np.int64),
+        )
+
+    @classmethod
+    def _aggregate(cls, cell, labels, frame, lat_idx, lon_idx, weights):
+        # Sum weights per (frame, cell) and store them sorted by frame
+        n_frames = len(labels)
+        if len(frame) == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return cls(cell, labels, np.zeros(n_frames + 1, dtype=np.int64), empty, empty, empty)
+
+        lat_min, lon_min = lat_idx.min(), lon_idx.min()
+        n_lat = int(lat_idx.max() - lat_min) + 1
+        n_lon = int(lon_idx.max() - lon_min) + 1
+        flat = (frame * n_lat + (lat_idx - lat_min)) * n_lon + (lon_idx - lon_min)
+
+        keys, inverse = np.unique(flat, return_inverse=True)
+        weights = np.bincount(inverse, weights=weights, minlength=len(keys)).astype(np.int64)
+
+        cells, lon_rel = np.divmod(keys, n_lon)
+        frames, lat_rel = np.divmod(cells, n_lat)
+        return cls(
+            cell, labels, np.searchsorted(frames, np.arange(n_frames + 1)),
+            lat_rel + lat_min, lon_rel + lon_min, weights,
+        )
+
+    def _frame_ids(self):
+        return np.repeat(np.arange(len(self.labels)), np.diff(self.offsets))
+
+    def merge(self, other):
+        """Frames over the incidents of both (same zoom; e.g. history + delta)."""
+        return DensityFrames._aggregate(
+            self.cell, self.labels,
+            np.concatenate([self._frame_ids(), other._frame_ids()]),
+            np.concatenate([self.lat_idx, other.lat_idx]),
+            np.concatenate([self.lon_idx, other.lon_idx]),
+            np.concatenate([self.weights, other.weights]),
+        )
+
+    def by_hour(self):
+        """The 24 hour-of-day frames (each the sum of its seven weekday frames)."""
+        return DensityFrames._aggregate(
+            self.cell, [f"{h:02d}:00" for h in range(HOURS)],
+            self._frame_ids() % HOURS, self.lat_idx, self.lon_idx, self.weights,
+        )
+
+    def __len__(self):
+        return len(self.labels)
+
+    def frame(self, f):
+        """Frame f as density_grid rows (cell centre latitude / longitude, weight)."""
+        rows = slice(self.offsets[f], self.offsets[f + 1])
+        return pd.DataFrame({
+            "latitude": (self.lat_idx[rows] + 0.5) * self.cell,
+            "longitude": (self.lon_idx[rows] + 0.5) * self.cell,
+            "weight": self.weights[rows],
+        })
+
+    def totals(self):
+        """Incidents per frame."""
+        totals = np.bincount(self._frame_ids(), weights=self.weights, minlength=len(self.labels))
+        return pd.Series(
+            totals.astype(np.int64),
+            index=pd.Index(self.labels, name="frame"), name="crime_count",
+        )
+
+    def peak_weight(self):
+        """Largest cell weight over all frames (one colour scale for every frame)."""
+        return int(self.weights.max()) if len(self.weights) else 0
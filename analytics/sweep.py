@@ -0,0 +1,92 @@
+"""
+Background KMeans sweep over k for the clustering page.
+
+ClusterSweep fits every k in a thread pool without blocking the caller and
+keeps, per finished k, only the centroids, inertia and a sampled silhouette.
+The page shows the elbow / silhouette curves as results arrive and switches
+to a finished k with one labelling pass over the rows.
+
+Every sweep in the process shares one bounded pool, so sessions and
+embeddings queue their fits rather than each starting a thread per k; a
+sweep that is no longer needed is cancelled, dropping the fits not started.
+
+Threads rather than processes: forking the (multithreaded) Streamlit server
+risks deadlocks, and spawned workers would each need a pickled copy of X.
+The distance passes run in numpy, which releases the GIL.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from analytics.clustering import SILHOUETTE_SAMPLE, assign_labels, fit_kmeans, silhouette_score
+
+SWEEP_KS = range(2, 11)
+SWEEP_WORKERS = max(1, (os.cpu_count() or 1) // 2)
+
+_pool = ThreadPoolExecutor(max_workers=SWEEP_WORKERS, thread_name_prefix="kmeans-sweep")
+
+
+def _fit_k(X, k, seed, sample_size):
+    labels, centroids = fit_kmeans(X, k, seed=seed)
+    _, inertia = assign_labels(X, centroids)
+    silhouette = silhouette_score(X, labels, sample_size, seed)
+    return k, centroids, inertia, silhouette
+
+
+class ClusterSweep:
+    """KMeans for each k in ks, fitted in background threads."""
+
+    def __init__(self, X, ks=SWEEP_KS, seed=42, sample_size=SILHOUETTE_SAMPLE,
+                 executor=None):
+        self.X = X
+        self.ks = list(ks)
+        self._results = {}
+        self._lock = threading.Lock()
+
+        executor = executor or _pool
+        self._pending = len(self.ks)
+        self._futures = [executor.submit(_fit_k, X, k, seed, sample_size) for k in self.ks]
+        for future in self._futures:
+            future.add_done_callback(self._collect)
+
+    def _collect(self, future):
+        with self._lock:
+            self._pending -= 1
+            if not future.cancelled() and future.exception() is None:
+                k, centroids, inertia, silhouette = future.result()
+                self._results[k] = (centroids, inertia, silhouette)
+
+    def cancel(self):
+        """Drop the fits not started yet (fits already running still finish)."""
+        for future in self._futures:
+            future.cancel()
+
+    @property
+    def done(self):
+        return self._pending == 0
+
+    def clusters(self, k):
+        """
+        (labels, centroids) for k, or None while k is still running; labels
+        are the rows' nearest centroids (one chunked pass).
+        """
+        result = self._results.get(k)
+        if result is None:
+            return None
+        centroids = result[0]
+        labels, _ = assign_labels(self.X, centroids)
+        return labels, centroids
+
+    def diagnostics(self):
+        """Inertia and silhouette per finished k (indexed by k)."""
+        with self._lock:
+            rows = {
+                k: {"Inertia": inertia, "Silhouette": silhouette}
+                for k, (_, inertia, silhouette) in sorted(self._results.items())
+            }
+        return pd.DataFrame.from_dict(
+            rows, orient="index", columns=["Inertia", "Silhouette"]
+        ).rename_axis("k")
@@ -0,0 +1,132 @@
+"""
+Temporal count cube for the Temporal Analysis page.
+
+Incidents are counted once per dataset version into a dense array indexed by
+hour × weekday × month × crime type × district. Any chart along those axes
+(hourly line, day-of-week bars, per-type or per-district slices) is then a sum
+over a few million cells instead of a groupby over every incident.
+"""
+
+import numpy as np
+import pandas as pd
+
+AXES = ("hour", "weekday", "month", "crime_type", "district")
+
+DAY_NAMES = [
+    "Monday", "Tuesday", "Wednesday",
+    "Thursday", "Friday", "Saturday", "Sunday"
+]
+MONTH_NAMES = [
+    "January", "February", "March", "April", "May", "June", "July",
+    "August", "September", "October", "November", "December"
+]
+
+
+def _axis_codes(values):
+    # Sorted labels and integer codes; missing values get code len(labels)
+    codes, labels = pd.factorize(values, sort=True)
+    codes = np.where(codes < 0, len(labels), codes)
+    if isinstance(labels.dtype, pd.CategoricalDtype):
+        # Plain labels for categorical columns, so cubes merge with any source
+        labels = labels.astype(labels.dtype.categories.dtype)
+    return codes, pd.Index(labels)
+
+
+class TemporalCube:
+    """
+    Dense incident counts over AXES.
+
+    Every axis has one extra trailing slot for rows where that value is
+    missing, so totals over other axes stay exact; queries leave it out.
+    """
+
+    def __init__(self, counts, labels):
+        self.counts = counts
+        self.labels = labels
+
+    @classmethod
+    def from_frame(cls, df, date_col="date", hour_col="hour",
+                   category_col=None, district_col=None):
+        dates = pd.to_datetime(df[date_col])
+        n_rows = len(df)
+
+        def missing_axis():
+            return np.zeros(n_rows, dtype=np.int64), pd.Index([])
+
+        hours = df[hour_col] if hour_col in df.columns else dates.dt.hour
+        axes = {
+            "hour": _axis_codes(hours),
+            "weekday": (
+                np.where(dates.isna(), 7, dates.dt.dayofweek.fillna(0)).astype(np.int64),
+                pd.Index(DAY_NAMES),
+            ),
+            "month": (
+                np.where(dates.isna(), 12, dates.dt.month.fillna(1) - 1).astype(np.int64),
+                pd.Index(MONTH_NAMES),
+            ),
+            "crime_type": (
+                _axis_codes(df[category_col]) if category_col else missing_axis()
+            ),
+            "district": (
+                _axis_codes(df[district_col]) if district_col else missing_axis()
+            ),
+        }
+
+        shape = tuple(len(axes[axis][1]) + 1 for axis in AXES)
+        flat = np.zeros(n_rows, dtype=np.int64)
+        for axis, size in zip(AXES, shape):
+            flat = flat * size + axes[axis][0]
+
+        counts = np.bincount(flat, minlength=int(np.prod(shape)))
+        counts = counts.reshape(shape).astype(np.int32)
+        return cls(counts, {axis: axes[axis][1] for axis in AXES})
+
+    def merge(self, other):
+        """Cube over the incidents of both cubes (axis labels are unioned)."""
+        labels = {
+            axis: self.labels[axis] if self.labels[axis].equals(other.labels[axis])
+            else self.labels[axis].union(other.labels[axis])
+            for axis in AXES
+        }
+        shape = tuple(len(labels[axis]) + 1 for axis in AXES)
+
+        counts = np.zeros(shape, dtype=np.int64)
+        for cube in (self, other):
+            # Position of each of the cube's labels (and its missing slot)
+            positions = [
+                np.append(labels[axis].get_indexer(cube.labels[axis]), len(labels[axis]))
+                for axis in AXES
+            ]
+            counts[np.ix_(*positions)] += cube.counts
+
+        return TemporalCube(counts.astype(np.int32), labels)
+
+    # ---------------------------
+    # Queries
+    # ---------------------------
+    def _select(self, filters):
+        cube = self.counts
+        for axis, wanted in filters.items():
+            position = AXES.index(axis)
+            wanted = [wanted] if np.isscalar(wanted) else list(wanted)
+            keep = self.labels[axis].get_indexer(wanted)
+            cube = np.take(cube, keep[keep >= 0], axis=position)
+        return cube
+
+    def counts_by(self, axis, drop_empty=True, **filters):
+        """
+        Incident counts along one axis, optionally restricted by other axes.
+
+        e.g. cube.counts_by("hour", crime_type=["THEFT"], district=[1, 2])
+        """
+        cube = self._select(filters)
+        position = AXES.index(axis)
+        other = tuple(i for i in range(len(AXES)) if i != position)
+
+        totals = cube.sum(axis=other, dtype=np.int64)[:len(self.labels[axis])]
+        series = pd.Series(totals, index=self.labels[axis], name="crime_count")
+        series.index.name = axis
+        return series[series > 0] if drop_empty else series
+
+    def total(self, **filters):
+        return int(self._select(filters).sum(dtype=np.int64))
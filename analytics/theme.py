@@ -0,0 +1,98 @@
+"""
+Page backgrounds served as static files instead of base64 data URIs.
+
+Each background is downscaled / recompressed once into a few widths under
+static/backgrounds (served by Streamlit at app/static/... when
+server.enableStaticServing is on), and the <style> block that picks a variant
+per viewport width is built once per process. A rerun only re-sends that
+short block.
+"""
+
+import shutil
+
+import streamlit as st
+
+from analytics.data import ROOT_DIR
+
+ASSETS_DIR = ROOT_DIR / "Assets"
+STATIC_DIR = ROOT_DIR / "static"
+STATIC_URL = "app/static"
+
+# Variant widths (px); a variant is only made if the source is wider
+VARIANT_WIDTHS = (960, 1600, 2400)
+JPEG_QUALITY = 70
+
+
+def _write_variants(source, target_dir):
+    from PIL import Image
+
+    variants = []
+    with Image.open(source) as image:
+        image = image.convert("RGB")
+        widths = [w for w in VARIANT_WIDTHS if w < image.width] or [image.width]
+        if image.width not in widths and image.width < VARIANT_WIDTHS[-1]:
+            widths.append(image.width)
+
+        for width in widths:
+            target = target_dir / f"{source.stem}-{width}.jpg"
+            if not target.exists() or target.stat().st_mtime < source.stat().st_mtime:
+                height = round(image.height * width / image.width)
+                image.resize((width, height), Image.LANCZOS).save(
+                    target, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True
+                )
+            variants.append((width, target))
+    return variants
+
+
+@st.cache_resource
+def background_variants(image_name):
+    """[(width, url), ...] of the resized copies of Assets/<image_name>, smallest first."""
+    source = ASSETS_DIR / image_name
+    target_dir = STATIC_DIR / "backgrounds"
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    try:
+        variants = _write_variants(source, target_dir)
+    except ImportError:
+        # No Pillow: serve the original file as the only variant
+        target = target_dir / source.name
+        shutil.copyfile(source, target)
+        variants = [(0, target)]
+
+    return [
+        (width, f"{STATIC_URL}/backgrounds/{path.name}")
+        for width, path in sorted(variants)
+    ]
+
+
+@st.cache_resource
+def background_css(image_name, extra_css=""):
+    """<style> block: background variant by viewport width + page-specific CSS."""
+    variants = background_variants(image_name)
+
+    smallest_url = variants[0][1]
+    rules = [
+        f"""
+        .stApp {{
+            background-image: url("{smallest_url}");
+            background-size: cover;
+            background-position: center;
+            background-repeat: no-repeat;
+            background-attachment: fixed;
+        }}"""
+    ]
+    # Viewports wider than the previous variant get the next larger one
+    for (previous_width, _), (_, url) in zip(variants, variants[1:]):
+        rules.append(
+            f"""
+        @media (min-width: {previous_width + 1}px) {{
+            .stApp {{ background-image: url("{url}"); }}
+        }}"""
+        )
+
+    return "<style>" + "".join(rules) + "\n" + extra_css + "\n</style>"
+
+
+def apply_background(image_name, extra_css=""):
+    """Apply the cached background (and extra CSS) to the current page."""
+    st.markdown(background_css(image_name, extra_css), unsafe_allow_html=True)
@@ -1,47 +1,29 @@
 import streamlit as st
-import base64
+
+from analytics.theme import apply_background
 
 st.set_page_config(
     page_title="Crime Analytics Platform",
     layout="wide"
 )
 
-# ---------------------------
-# Load background image
-# ---------------------------
-def get_base64_image(image_path):
-    with open(image_path, "rb") as img_file:
-        return base64.b64encode(img_file.read()).decode()
-
-bg_image = get_base64_image("Assets/police_patrol.jpg")
-
 # ---------------------------
 # Apply CSS Background
 # ---------------------------
-st.markdown(
-    f"""
-    <style>
-    .stApp {{
-        background-image: url("data:image/jpg;base64,{bg_image}");
-        background-size: cover;
-        background-position: center;
-        background-repeat: no-repeat;
-        background-attachment: fixed;
-    }}
-
+apply_background(
+    "police_patrol.jpg",
+    """
     /* Overlay for readability */
-    .block-container {{
+    .block-container {
         background-color: rgba(0, 0, 0, 0.55);
         padding: 2rem;
         border-radius: 12px;
-    }}
+    }
 
-    h1, h2, h3, p, li {{
+    h1, h2, h3, p, li {
         color: #ffffff !important;
-    }}
-    </style>
-    """,
-    unsafe_allow_html=True
+    }
+    """
 )
 
 # ---------------------------
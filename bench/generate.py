@@ -0,0 +1,166 @@
+"""
+Synthetic crime records with the schema the pages expect.
+
+    python -m bench.generate 1M Data/synthetic_1M.csv
+
+Distributions are shaped like the city export: a skewed crime-type mix,
+incidents clustered around hotspots inside the city bounds, a diurnal hour
+profile, more incidents on weekends, and district / beat / ward / community
+area derived from position.
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from analytics.data import DATE_FORMAT
+
+CHUNK_SIZE = 1_000_000
+
+CRIME_TYPES = [
+    "THEFT", "BATTERY", "CRIMINAL DAMAGE", "NARCOTICS", "ASSAULT",
+    "OTHER OFFENSE", "BURGLARY", "MOTOR VEHICLE THEFT", "DECEPTIVE PRACTICE",
+    "ROBBERY", "CRIMINAL TRESPASS", "WEAPONS VIOLATION", "PROSTITUTION",
+    "PUBLIC PEACE VIOLATION", "OFFENSE INVOLVING CHILDREN", "SEX OFFENSE",
+    "CRIM SEXUAL ASSAULT", "INTERFERENCE WITH PUBLIC OFFICER", "GAMBLING",
+    "LIQUOR LAW VIOLATION", "ARSON", "HOMICIDE", "KIDNAPPING", "STALKING",
+    "INTIMIDATION",
+]
+# Zipf-like share per type, most common first
+TYPE_WEIGHTS = 1.0 / np.arange(1, len(CRIME_TYPES) + 1) ** 1.1
+TYPE_WEIGHTS /= TYPE_WEIGHTS.sum()
+
+# City bounds and hotspot mixture (latitude, longitude)
+LAT_RANGE = (41.64, 42.02)
+LON_RANGE = (-87.94, -87.52)
+N_HOTSPOTS = 60
+HOTSPOT_SHARE = 0.7
+HOTSPOT_SPREAD = 0.008
+
+# Relative incident rate per hour of day (low before dawn, peak evening)
+HOUR_WEIGHTS = np.array([
+    4.5, 3.6, 3.0, 2.4, 1.9, 1.7, 2.1, 2.9, 3.8, 4.3, 4.5, 4.6,
+    5.6, 4.8, 4.8, 5.0, 5.1, 5.2, 5.4, 5.3, 5.1, 4.9, 4.8, 4.6,
+])
+HOUR_WEIGHTS = HOUR_WEIGHTS / HOUR_WEIGHTS.sum()
+
+START_DATE = pd.Timestamp("2018-01-01")
+N_DAYS = 5 * 365
+
+LOCATION_DESCRIPTIONS = [
+    "STREET", "RESIDENCE", "APARTMENT", "SIDEWALK", "OTHER",
+    "PARKING LOT/GARAGE(NON.RESID.)", "ALLEY", "SMALL RETAIL STORE",
+    "RESTAURANT", "SCHOOL, PUBLIC, BUILDING",
+]
+
+
+def parse_size(text):
+    """'100k' / '1M' / '50M' / '2500' -> number of rows."""
+    text = str(text).strip().upper()
+    multiplier = {"K": 1_000, "M": 1_000_000}.get(text[-1:], 1)
+    number = text[:-1] if multiplier > 1 else text
+    return int(float(number) * multiplier)
+
+
+def generate_crimes(n_rows, seed=42, start_id=0):
+    """DataFrame of n_rows synthetic incidents (lowercase column names)."""
+    rng = np.random.default_rng(seed)
+
+    # ---------------------------
+    # Location: hotspot mixture + uniform background
+    # ---------------------------
+    hotspot_rng = np.random.default_rng(0)
+    centres = np.column_stack([
+        hotspot_rng.uniform(*LAT_RANGE, N_HOTSPOTS),
+        hotspot_rng.uniform(*LON_RANGE, N_HOTSPOTS),
+    ])
+    hotspot_weights = hotspot_rng.pareto(1.5, N_HOTSPOTS) + 1
+    hotspot_weights /= hotspot_weights.sum()
+
+    in_hotspot = rng.random(n_rows) < HOTSPOT_SHARE
+    centre = centres[rng.choice(N_HOTSPOTS, n_rows, p=hotspot_weights)]
+    latitude = np.where(
+        in_hotspot,
+        centre[:, 0] + rng.normal(0, HOTSPOT_SPREAD, n_rows),
+        rng.uniform(*LAT_RANGE, n_rows),
+    ).clip(*LAT_RANGE)
+    longitude = np.where(
+        in_hotspot,
+        centre[:, 1] + rng.normal(0, HOTSPOT_SPREAD, n_rows),
+        rng.uniform(*LON_RANGE, n_rows),
+    ).clip(*LON_RANGE)
+
+    # Administrative areas are a coarse grid over the city
+    lat_pos = (latitude - LAT_RANGE[0]) / (LAT_RANGE[1] - LAT_RANGE[0])
+    lon_pos = (longitude - LON_RANGE[0]) / (LON_RANGE[1] - LON_RANGE[0])
+    district = (np.minimum(lat_pos * 5, 4).astype(int) * 5
+                + np.minimum(lon_pos * 5, 4).astype(int) + 1)
+    beat = district * 100 + (np.minimum(lat_pos * 20, 19).astype(int) % 4) * 10 \
+        + np.minimum(lon_pos * 20, 19).astype(int) % 4 + 11
+    ward = np.minimum(lat_pos * 10, 9).astype(int) * 5 + np.minimum(lon_pos * 5, 4).astype(int) + 1
+    community_area = np.minimum(lat_pos * 11, 10).astype(int) * 7 + np.minimum(lon_pos * 7, 6).astype(int) + 1
+
+    # ---------------------------
+    # Time: weekend-heavy days, diurnal hours
+    # ---------------------------
+    day = rng.integers(0, N_DAYS, n_rows)
+    weekday = (START_DATE.dayofweek + day) % 7
+    weekend = weekday >= 4
+    day = np.where(weekend | (rng.random(n_rows) < 0.9), day, rng.integers(0, N_DAYS, n_rows))
+    hour = rng.choice(24, n_rows, p=HOUR_WEIGHTS)
+    seconds = rng.integers(0, 3600, n_rows)
+    dates = START_DATE + pd.to_timedelta(day * 86400 + hour * 3600 + seconds, unit="s")
+
+    crime_type = np.array(CRIME_TYPES)[rng.choice(len(CRIME_TYPES), n_rows, p=TYPE_WEIGHTS)]
+    location = pd.Series(latitude.round(6)).astype(str).radd("(") + ", " \
+        + pd.Series(longitude.round(6)).astype(str) + ")"
+
+    return pd.DataFrame({
+        "id": np.arange(start_id, start_id + n_rows),
+        "date": dates.strftime(DATE_FORMAT),
+        "primary type": crime_type,
+        "location description": np.array(LOCATION_DESCRIPTIONS)[
+            rng.integers(0, len(LOCATION_DESCRIPTIONS), n_rows)
+        ],
+        "arrest": rng.random(n_rows) < 0.2,
+        "domestic": rng.random(n_rows) < 0.15,
+        "beat": beat,
+        "district": district,
+        "ward": ward,
+        "community area": community_area,
+        "x coordinate": ((longitude + 87.94) * 82_000 + 1_092_000).round(),
+        "y coordinate": ((latitude - 41.64) * 111_000 + 1_813_000).round(),
+        "year": dates.year,
+        "latitude": latitude,
+        "longitude": longitude,
+        "location": location,
+        "hour": hour,
+    })
+
+
+def write_crimes_csv(path, n_rows, seed=42, chunk_size=CHUNK_SIZE):
+    """Write n_rows synthetic incidents to CSV in chunks (bounded memory)."""
+    written = 0
+    while written < n_rows:
+        size = min(chunk_size, n_rows - written)
+        chunk = generate_crimes(size, seed=seed + written, start_id=written)
+        chunk.to_csv(path, mode="w" if written == 0 else "a",
+                     header=written == 0, index=False)
+        written += size
+    return path
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("usage: python -m bench.generate SIZE OUTPUT.csv  (SIZE e.g. 100k, 1M)")
+        return 2
+    n_rows = parse_size(argv[0])
+    write_crimes_csv(argv[1], n_rows)
+    print(f"Wrote {n_rows} rows to {argv[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
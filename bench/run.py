@@ -0,0 +1,223 @@
+"""
+Timing and peak-memory harness for every page's compute path.
+
+    python -m bench.run --sizes 100k 1M --output bench_results.json
+    python -m bench.run --sizes 1M --baseline bench_results.json
+
+For each size a synthetic CSV is generated (and kept in --data-dir), then
+each stage is run with the same analytics functions the pages call, timed
+as the best of --repeats runs. Results are written as JSON; with --baseline
+the run exits non-zero when a stage got slower than --tolerance × its
+baseline time by more than --min-seconds (millisecond stages are noise).
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analytics import pipeline
+from analytics.clustering import fit_kmeans
+from analytics.crosstab import Crosstab
+from analytics.data import compact_dtypes, read_csv
+from analytics.reduction import accumulate_stats, fit_pca, iter_chunks, project
+from analytics.sampling import stratified_sample_index
+from analytics.spatial import SpatialGrid, density_grid
+from analytics.temporal import TemporalCube
+from bench.generate import parse_size, write_crimes_csv
+
+DEFAULT_SIZES = ["100k", "1M"]
+CATEGORY_COL = "primary type"
+
+# Set from --no-memory; tracing doubles the run time of every stage
+TRACE_MEMORY = True
+# Set from --repeats; each stage's time is the best of this many runs
+REPEATS = 3
+
+
+def measure(func, *args, **kwargs):
+    """
+    Run func; return (result, seconds, peak traced MB).
+
+    The time is the best of REPEATS untraced runs. tracemalloc slows
+    Python-heavy code down a lot, so the peak comes from one more, traced
+    run (skipped, with a peak of None, when TRACE_MEMORY is off).
+    """
+    seconds = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds = min(seconds, time.perf_counter() - start)
+
+    if not TRACE_MEMORY:
+        return result, seconds, None
+
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak / 2**20
+
+
+# ---------------------------
+# Stages (same order as the pages use them)
+# ---------------------------
+def _hotspot(df):
+    grid = SpatialGrid.from_frame(df, CATEGORY_COL)
+    lat, lon, _ = grid.max_cell()
+    return grid.cell_crime_types(lat, lon)
+
+
+def _temporal(df):
+    cube = TemporalCube.from_frame(df, category_col=CATEGORY_COL, district_col="district")
+    return cube.counts_by("hour"), cube.counts_by("weekday")
+
+
+def _crosstab(df, labels):
+    table = Crosstab.from_arrays(labels, df[CATEGORY_COL], "Cluster", CATEGORY_COL)
+    return table.to_frame(), table.row(0)
+
+
+def run_stages(csv_path):
+    """Yield (stage, seconds, peak_mb, rows) for one dataset."""
+    df, seconds, peak = measure(read_csv, csv_path)
+    n_rows = len(df)
+    yield "csv_load", seconds, peak, n_rows
+
+    # The remaining stages run on the compact frame, as the pages do
+    df, seconds, peak = measure(compact_dtypes, df)
+    yield "compact_dtypes", seconds, peak, n_rows
+
+    _, seconds, peak = measure(stratified_sample_index, df[CATEGORY_COL], n_per_group=300)
+    yield "balanced_sampling", seconds, peak, n_rows
+
+    _, seconds, peak = measure(_hotspot, df)
+    yield "geo_binning_hotspot", seconds, peak, n_rows
+
+    _, seconds, peak = measure(density_grid, df["latitude"], df["longitude"])
+    yield "density_grid", seconds, peak, n_rows
+
+    _, seconds, peak = measure(pipeline.build_hotspots, df, CATEGORY_COL)
+    yield "hotspot_detection", seconds, peak, n_rows
+
+    _, seconds, peak = measure(pipeline.build_density_frames, df, 12)
+    yield "density_frames", seconds, peak, n_rows
+
+    _, seconds, peak = measure(pipeline.build_patrol_model, df, CATEGORY_COL)
+    yield "patrol_model", seconds, peak, n_rows
+
+    _, seconds, peak = measure(_temporal, df)
+    yield "hourly_weekday_aggregation", seconds, peak, n_rows
+
+    X = pipeline.feature_matrix(df)
+    _, seconds, peak = measure(lambda: accumulate_stats(iter_chunks(X)))
+    yield "standardization", seconds, peak, n_rows
+
+    basis, seconds, peak = measure(fit_pca, X)
+    yield "pca", seconds, peak, n_rows
+
+    X_pca = project(X, basis, 2)
+    (labels, _), seconds, peak = measure(fit_kmeans, X_pca, 4, n_jobs=-1)
+    yield "kmeans", seconds, peak, n_rows
+
+    _, seconds, peak = measure(_crosstab, df, labels)
+    yield "crime_cluster_crosstab", seconds, peak, n_rows
+
+
+def environment():
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance, min_seconds=0.0):
+    """
+    Stages slower than tolerance × baseline (and by more than min_seconds),
+    as printable strings.
+    """
+    previous = {(r["size"], r["stage"]): r["seconds"] for r in baseline["results"]}
+    regressions = []
+    for record in results:
+        before = previous.get((record["size"], record["stage"]))
+        if (
+            before and record["seconds"] > before * tolerance
+            and record["seconds"] - before > min_seconds
+        ):
+            regressions.append(
+                f"{record['size']} {record['stage']}: "
+                f"{before:.3f}s -> {record['seconds']:.3f}s"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES,
+                        help="dataset sizes, e.g. 100k 1M 10M 50M")
+    parser.add_argument("--data-dir", default="bench_data",
+                        help="where generated CSVs are kept between runs")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="previous results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25)
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="ignore slowdowns smaller than this many seconds")
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="timed runs per stage (the best one counts)")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the traced peak-memory runs")
+    args = parser.parse_args(argv)
+
+    global TRACE_MEMORY, REPEATS
+    TRACE_MEMORY = not args.no_memory
+    REPEATS = max(1, args.repeats)
+
+    data_dir = Path(args.data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    results = []
+    for size in args.sizes:
+        n_rows = parse_size(size)
+        csv_path = data_dir / f"crimes_{size}.csv"
+        if not csv_path.exists():
+            print(f"Generating {size} rows -> {csv_path}")
+            write_crimes_csv(csv_path, n_rows)
+
+        for stage, seconds, peak, rows in run_stages(csv_path):
+            memory = f"{peak:10.1f} MB" if peak is not None else ""
+            print(f"{size:>6} {stage:<28} {seconds:9.3f}s {memory}")
+            results.append({
+                "size": size, "stage": stage, "rows": rows,
+                "seconds": round(seconds, 6),
+                "peak_mb": round(peak, 3) if peak is not None else None,
+            })
+
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_seconds)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
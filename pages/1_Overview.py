@@ -1,76 +1,62 @@
 import streamlit as st
-import pandas as pd
-import base64
+
+from analytics import pipeline
+from analytics.artifacts import load_or_compute
+from analytics.data import DATA_PATH, dataset_version, load_crimes, load_preview, memory_report
+from analytics.filters import filtered_rows, take_rows
+from analytics.instrument import PageRun
+from analytics.manifest import load_manifest
+from analytics.theme import apply_background
 
 st.set_page_config(
     page_title="Crime Data Overview",
     layout="wide"
 )
 
-# ---------------------------
-# Load Background Image
-# ---------------------------
-def get_base64_image(image_path):
-    with open(image_path, "rb") as img_file:
-        return base64.b64encode(img_file.read()).decode()
-
-bg_image = get_base64_image("/mount/src/crime_analysis/Assets/city-view.jpeg")
-
 # ---------------------------
 # Apply CSS for Background, Main Text, and Sidebar
 # ---------------------------
-st.markdown(
-    f"""
-    <style>
-    /* Background */
-    .stApp {{
-        background-image: url("data:image/jpeg;base64,{bg_image}");
-        background-size: cover;
-        background-position: center;
-        background-repeat: no-repeat;
-        background-attachment: fixed;
-    }}
-
+apply_background(
+    "city-view.jpeg",
+    """
     /* Main container overlay for readability */
-    .block-container {{
+    .block-container {
         background-color: rgba(0, 0, 0, 0.55);
         padding: 2rem;
         border-radius: 12px;
         color: #ffffff;
-    }}
+    }
 
     /* Force all headers, paragraphs, lists, metric labels & numbers to white */
-    h1, h2, h3, h4, h5, h6, p, li, div, td, th {{
+    h1, h2, h3, h4, h5, h6, p, li, div, td, th {
         color: #ffffff !important;
-    }}
+    }
 
     /* Streamlit metric number & label */
-    .stMetricValue {{
+    .stMetricValue {
         color: #ffffff !important;
-    }}
-    .stMetricLabel {{
+    }
+    .stMetricLabel {
         color: #ffffff !important;
-    }}
+    }
 
     /* Streamlit table header & body */
-    .css-1lcbmhc th {{
+    .css-1lcbmhc th {
         color: #ffffff !important;
-    }}
-    .css-1lcbmhc td {{
+    }
+    .css-1lcbmhc td {
         color: #ffffff !important;
-    }}
+    }
 
     /* ---------------- Sidebar ---------------- */
-    .css-1d391kg {{
+    .css-1d391kg {
         background-color: #000000 !important;  /* Black sidebar */
         color: #ffffff !important;
-    }}
-    .css-1d391kg * {{
+    }
+    .css-1d391kg * {
         color: #ffffff !important;
-    }}
-    </style>
-    """,
-    unsafe_allow_html=True
+    }
+    """
 )
 
 # ---------------------------
@@ -79,36 +65,86 @@ st.markdown(
 # ---------------------------
 st.title("📌 Crime Data Overview")
 
-df = pd.read_csv("/mount/src/crime_analysis/Data/Crimes_Record_No_Outliers.csv")
-
-# Normalize column names
-df.columns = df.columns.str.strip().str.lower()
+run = PageRun("Overview")
 
+# Column roles and statistics from the dataset manifest (written at ingestion)
 # ---------------------------
 # Detect Columns SAFELY
 # ---------------------------
-crime_col = None
-location_col = None
-
-for col in df.columns:
-    if "primary" in col and "type" in col:
-        crime_col = col
-    if "location" in col:
-        location_col = col
+with run.stage("column detection"):
+    manifest = load_manifest()
+    crime_col = manifest["roles"]["category"]
+    location_col = manifest["roles"]["location"]
 
 if crime_col is None or location_col is None:
     st.error("❌ Required columns not found in dataset")
-    st.write("Available columns:", df.columns.tolist())
+    st.write("Available columns:", list(manifest["columns"]))
     st.stop()
 
+# Shared date / crime type / district filters (indexed row selection)
+with run.stage("filter"):
+    rows, version = filtered_rows(dataset_version())
+
+# Row / crime type counts and the location distinct-count sketch: precomputed
+# (and kept current by `ingest --append`) when available, otherwise one
+# streaming pass over the two columns needed; filtered views count only the
+# selected rows of those two columns
+@st.cache_resource(max_entries=4)
+def get_overview_counts(version, crime_col, location_col, _rows):
+    def compute():
+        if _rows is None:
+            return pipeline.stream_overview_counts(DATA_PATH, crime_col, location_col)
+        df = take_rows(load_crimes(columns=[crime_col, location_col]), _rows)
+        return pipeline.overview_counts(df, crime_col, location_col)
+
+    return load_or_compute("overview_counts", version, compute)
+
+# The unfiltered totals are read straight from the manifest
+if rows is None and manifest["rows"] is not None:
+    columns = manifest["columns"]
+    total_crimes = manifest["rows"]
+    crime_types = columns[crime_col]["distinct"]
+    locations = columns[location_col]["distinct"]
+    locations_error = columns[location_col]["distinct_error"]
+else:
+    with run.stage("overview counts") as stage:
+        counts = get_overview_counts(version, crime_col, location_col, rows)
+        stage["rows"] = counts["rows"]
+    total_crimes = counts["rows"]
+    crime_types = len(counts["crime_types"])
+    locations = counts["locations"].count()
+    locations_error = counts["locations"].relative_error
+
 # ---------------------------
 # Page Content
 # ---------------------------
 st.title("📌 Crime Data Overview")
 
-st.metric("Total Crimes", len(df))
-st.metric("Crime Types", df[crime_col].nunique())
-st.metric("Locations", df[location_col].nunique())
+st.metric("Total Crimes", total_crimes)
+st.metric("Crime Types", crime_types)
+# A HyperLogLog estimate can overshoot, but never past one location per incident
+locations = min(locations, total_crimes)
+st.metric(
+    "Locations",
+    f"≈ {locations}" if locations_error else locations,
+    help=f"Approximate (±{locations_error:.1%})" if locations_error else None
+)
 
 st.subheader("📄 Sample Crime Records")
-st.dataframe(df.head())
+with run.stage("preview load") as stage:
+    preview = load_preview()
+    stage["rows"] = len(preview)
+st.dataframe(preview)
+
+# ---------------------------
+# Memory usage of the shared dataset
+# ---------------------------
+with st.expander("🧠 Memory usage of the loaded dataset"):
+    # Loads the full frame the other pages share (if not already cached)
+    if st.checkbox("Show per-column breakdown"):
+        with run.stage("data load") as stage:
+            df = load_crimes()
+            stage["rows"] = len(df)
+        st.dataframe(memory_report(df).style.format({"MB": "{:.2f}", "share": "{:.1%}"}))
+
+run.show_panel()
@@ -1,129 +1,292 @@
-import base64
 import streamlit as st
-import pandas as pd
 import pydeck as pdk
 import os
 
+from analytics import pipeline
+from analytics.artifacts import load_or_compute
+from analytics.data import dataset_version, load_crimes
+from analytics.filters import filtered_rows, take_rows
+from analytics.hotspots import HOTSPOT_RADII_M, HOTSPOT_RADIUS_M, TOP_HOTSPOTS
+from analytics.patrol import HOUR_BLOCK, PATROL_UNITS, RECENCY_HALF_LIFE_DAYS, TOP_RECOMMENDATIONS
+from analytics.instrument import PageRun
+from analytics.manifest import centre, load_manifest
+from analytics.spatial import GRID_PRECISIONS
+
 # ---------------------------
 # MAPBOX TOKEN (REQUIRED)
 # ---------------------------
 os.environ["MAPBOX_API_KEY"] = os.getenv("MAPBOX_API_KEY", "")
 
 st.set_page_config(layout="wide")
-st.title("🗺 Geographic Crime Heatmap (Balanced Sample)")
+st.title("🗺 Geographic Crime Heatmap")
+
+run = PageRun("Geographic Map")
 
 # ---------------------------
-# Load CSV
+# Load Data
 # ---------------------------
-df = pd.read_csv("/mount/src/crime_analysis/Data/Crimes_Record_No_Outliers.csv")
-
-df.columns = df.columns.str.strip().str.lower()
+# Column names are normalized (and lat/lon/lng aliased) by the loader;
+# only the columns this page uses are loaded. Column roles come from the
+# dataset manifest (written at ingestion)
+with run.stage("manifest"):
+    manifest = load_manifest()
+roles = manifest["roles"]
+
+with run.stage("data load") as stage:
+    df = load_crimes(columns=pipeline.MAP_COLUMNS)
+    stage["rows"] = len(df)
+
+# Shared filters (analytics.filters): the selected rows and their view version
+with run.stage("filter"):
+    rows, version = filtered_rows(dataset_version())
+df = take_rows(df, rows)
 #st.write("Columns:", df.columns.tolist())
 
 # ---------------------------
 # Category Column
 # ---------------------------
-if "primary type" in df.columns:
-    category_col = "primary type"
-elif "primary_type" in df.columns:
-    category_col = "primary_type"
-else:
+category_col = roles["category"]
+
+if category_col not in df.columns:
     st.error("❌ No crime category column found")
     st.stop()
 
 # ---------------------------
 # Latitude / Longitude
 # ---------------------------
-rename_map = {
-    "lat": "latitude",
-    "lon": "longitude",
-    "lng": "longitude"
-}
-df.rename(columns=rename_map, inplace=True)
-
-if "latitude" not in df.columns or "longitude" not in df.columns:
+if not roles["coordinates"]:
     st.error("❌ latitude / longitude columns missing")
     st.stop()
 
-df["latitude"] = pd.to_numeric(df["latitude"], errors="coerce")
-df["longitude"] = pd.to_numeric(df["longitude"], errors="coerce")
-df = df.dropna(subset=["latitude", "longitude", category_col])
+with run.stage("type coercion", rows=len(df)):
+    df = pipeline.clean_coordinates(df, category_col)
+
+# Incidents with their date / hour, for the time-based views below (heatmap
+# playback, patrol windows); loaded only when one of them is computed live
+has_dates = roles["timestamp"] is not None
+
+def timed_incidents(rows):
+    frame_df = take_rows(load_crimes(columns=pipeline.FRAME_COLUMNS), rows)
+    return pipeline.clean_coordinates(frame_df, category_col)
 
 # ---------------------------
-# Balanced Sampling
+# Heatmap Settings
 # ---------------------------
-SAMPLE_PER_CATEGORY = 300
-
-df_sampled = (
-    df.groupby(category_col, group_keys=False)
-      .apply(lambda x: x.sample(
-          n=min(len(x), SAMPLE_PER_CATEGORY),
-          random_state=42
-      ))
+st.sidebar.header("Heatmap Settings")
+
+PLAYBACK = "Time playback (hourly frames)"
+
+heatmap_mode = st.sidebar.radio(
+    "Heatmap Data",
+    options=["All incidents (aggregated grid)", "Balanced sample"]
+    + ([PLAYBACK] if has_dates else [])
 )
 
-if df_sampled.empty:
-    st.error("❌ No data available after sampling")
-    st.stop()
+map_zoom = st.sidebar.slider(
+    "Map Zoom (grid detail)",
+    min_value=8,
+    max_value=15,
+    value=11
+)
 
-st.success(f"Sampled rows: {len(df_sampled)}")
+if heatmap_mode == "Balanced sample":
+    # ---------------------------
+    # Balanced Sampling
+    # ---------------------------
+    SAMPLE_PER_CATEGORY = pipeline.SAMPLE_PER_CATEGORY
+
+    # Row positions picked in one vectorized pass, cached per sample size
+    @st.cache_data(max_entries=8, show_spinner="Sampling incidents...")
+    def balanced_sample_index(version, category_col, n_per_group, _df):
+        return load_or_compute(
+            pipeline.balanced_sample_artifact(n_per_group), version,
+            lambda: pipeline.balanced_sample_index(_df, category_col, n_per_group)
+        )
+
+    with run.stage("sampling", rows=len(df)):
+        heatmap_data = df.iloc[
+            balanced_sample_index(version, category_col, SAMPLE_PER_CATEGORY, df)
+        ]
+
+    if heatmap_data.empty:
+        st.error("❌ No data available after sampling")
+        st.stop()
+
+    heatmap_data = heatmap_data.assign(weight=1)
+    st.success(f"Sampled rows: {len(heatmap_data)}")
+elif heatmap_mode == PLAYBACK:
+    # ---------------------------
+    # Time Playback Frames
+    # ---------------------------
+    by_weekday = st.sidebar.radio(
+        "Frames", ["Hour of day (24)", "Weekday × hour (168)"]
+    ) != "Hour of day (24)"
+    playing = st.sidebar.toggle("▶ Play")
+
+    # Weekday × hour grids from one pass over the incidents (or precomputed,
+    # and rolled forward by appends); the 24 hourly frames are sums of those.
+    # Stepping through frames slices the cached arrays
+    @st.cache_resource(max_entries=8, show_spinner="Aggregating hourly frames...")
+    def build_density_frames(version, zoom, by_weekday, category_col, _rows):
+        frames = load_or_compute(
+            pipeline.density_frames_artifact(zoom), version,
+            lambda: pipeline.build_density_frames(timed_incidents(_rows), zoom)
+        )
+        return frames if by_weekday else frames.by_hour()
+
+    with run.stage("frame binning", rows=len(df)):
+        frames = build_density_frames(version, map_zoom, by_weekday, category_col, rows)
+
+    if not frames.peak_weight():
+        st.error("❌ No dated incidents available for playback")
+        st.stop()
+
+    heatmap_data = None
+    frame_totals = frames.totals()
+    st.success(
+        f"Aggregated {frame_totals.sum()} incidents into {len(frames)} frames"
+    )
+else:
+    # ---------------------------
+    # Server-side Density Grid
+    # ---------------------------
+    # Every incident is counted into cells sized for the zoom level; the
+    # browser receives one weighted point per non-empty cell
+    @st.cache_data(max_entries=16, show_spinner="Aggregating incidents...")
+    def build_density_grid(version, zoom, _df):
+        return load_or_compute(
+            pipeline.density_grid_artifact(zoom), version,
+            lambda: pipeline.build_density_grid(_df, zoom)
+        )
+
+    with run.stage("geo binning", rows=len(df)):
+        heatmap_data = build_density_grid(version, map_zoom, df)
+
+    if heatmap_data.empty:
+        st.error("❌ No data available for the heatmap")
+        st.stop()
+
+    st.success(
+        f"Aggregated {len(df)} incidents into {len(heatmap_data)} grid cells"
+    )
+
+# ---------------------------
+# Top-N Hotspots
+# ---------------------------
+hotspot_radius = st.sidebar.select_slider(
+    "Hotspot Radius (m)",
+    options=list(HOTSPOT_RADII_M),
+    value=HOTSPOT_RADIUS_M
+)
+
+n_hotspots = st.sidebar.slider(
+    "Hotspots Shown",
+    min_value=1,
+    max_value=TOP_HOTSPOTS,
+    value=5
+)
+
+# Density peaks over every incident (grid neighbour search), cached per
+# dataset version and radius; the count slider only slices the ranking
+@st.cache_resource(max_entries=4, show_spinner="Detecting hotspots...")
+def detect_hotspots(version, category_col, radius_m, _df):
+    return load_or_compute(
+        pipeline.hotspots_artifact(radius_m), version,
+        lambda: pipeline.build_hotspots(_df, category_col, radius_m)
+    )
+
+with run.stage("hotspot detection", rows=len(df)):
+    hotspots = detect_hotspots(version, category_col, hotspot_radius, df)
+top_hotspots = hotspots.top(n_hotspots)
 
 # ---------------------------
 # View State (IMPORTANT)
 # ---------------------------
+# Centred on the manifest's mean position; a filtered view on its own rows
+view_centre = centre(manifest) if rows is None else None
+if view_centre is None:
+    view_centre = df["latitude"].mean(), df["longitude"].mean()
+
 view_state = pdk.ViewState(
-    latitude=float(df_sampled["latitude"].mean()),
-    longitude=float(df_sampled["longitude"].mean()),
-    zoom=11,
+    latitude=float(view_centre[0]),
+    longitude=float(view_centre[1]),
+    zoom=map_zoom,
     pitch=40,
     bearing=0
 )
 
-# ---------------------------
-# HEATMAP LAYER (IMPROVED)
-# ---------------------------
-heatmap_layer = pdk.Layer(
-    "HeatmapLayer",
-    data=df_sampled,
+hotspot_layer = pdk.Layer(
+    "ScatterplotLayer",
+    data=top_hotspots.reset_index(),
     get_position="[longitude, latitude]",
-    get_weight=1,
-    radius_pixels=40,
-    intensity=1.0,
-    threshold=0.05
+    get_radius="radius_m",
+    get_fill_color=[255, 75, 75, 50],
+    get_line_color=[255, 75, 75],
+    stroked=True,
+    line_width_min_pixels=2,
+    pickable=True
 )
 
 # ---------------------------
-# Render Map (FIXED)
+# HEATMAP LAYER (IMPROVED)
 # ---------------------------
-deck = pdk.Deck(
-    map_style="mapbox://styles/mapbox/light-v11",
-    initial_view_state=view_state,
-    layers=[heatmap_layer],
-    tooltip={
-        "text": "{primary type}"
-    }
-)
-
-st.pydeck_chart(deck)
-# Identify location column
-possible_cols = ["location", "district", "beat", "ward", "area"]
+def heatmap_deck(heatmap_data, color_domain=None):
+    heatmap_layer = pdk.Layer(
+        "HeatmapLayer",
+        data=heatmap_data[["latitude", "longitude", "weight"]],
+        get_position="[longitude, latitude]",
+        get_weight="weight",
+        radius_pixels=40,
+        intensity=1.0,
+        threshold=0.05,
+        color_domain=color_domain
+    )
 
-location_col = None
-for col in possible_cols:
-    if col in df.columns:
-        location_col = col
-        break
+    # ---------------------------
+    # Render Map (FIXED)
+    # ---------------------------
+    return pdk.Deck(
+        map_style="mapbox://styles/mapbox/light-v11",
+        initial_view_state=view_state,
+        layers=[heatmap_layer, hotspot_layer],
+        tooltip={
+            "text": "Hotspot {Hotspot}: {crime_count} crimes, mostly {top_crime_type}"
+        }
+    )
 
-if location_col is None:
+if heatmap_data is not None:
+    st.pydeck_chart(heatmap_deck(heatmap_data))
+else:
+    # Only this fragment reruns while playing: each tick sends one frame's
+    # non-empty cells, on a colour scale shared by every frame
+    PLAYBACK_SECONDS = 1.0
+
+    @st.fragment(run_every=PLAYBACK_SECONDS if playing else None)
+    def playback_map():
+        frame = st.session_state.get("heatmap_frame", 0) % len(frames)
+        if playing:
+            frame = (frame + 1) % len(frames)
+        st.session_state["heatmap_frame"] = frame
+
+        st.slider("Frame", min_value=0, max_value=len(frames) - 1, key="heatmap_frame")
+        st.caption(f"{frames.labels[frame]}: {frame_totals.iloc[frame]} incidents")
+        st.pydeck_chart(heatmap_deck(frames.frame(frame), color_domain=[0, frames.peak_weight()]))
+
+    playback_map()
+# Location column (from the manifest roles)
+location_col = roles["location"]
+
+if location_col not in df.columns:
     st.warning("No location name column found")
 else:
-    max_location = (
-        df[location_col]
-        .value_counts()
-        .idxmax()
-    )
+    with run.stage("location counts", rows=len(df)):
+        max_location = (
+            df[location_col]
+            .value_counts()
+            .idxmax()
+        )
 
-    max_count = df[location_col].value_counts().max()
+        max_count = df[location_col].value_counts().max()
 
     st.metric(
         label="📍 Location with Maximum Crimes",
@@ -136,25 +299,28 @@ else:
 # Identify Max Crime Location (Coordinates)
 # ---------------------------
 
-# Create geo bins (adjust precision if needed)
-df["lat_bin"] = df["latitude"].round(4)
-df["lon_bin"] = df["longitude"].round(4)
+# Grid index with counts per cell and per cell × crime type, built once per
+# dataset version at every precision in GRID_PRECISIONS
+@st.cache_resource(max_entries=2, show_spinner="Indexing crime locations...")
+def build_spatial_grid(version, category_col, _df):
+    return load_or_compute(
+        "spatial_grid", version,
+        lambda: pipeline.build_spatial_grid(_df, category_col)
+    )
+
+with run.stage("spatial grid", rows=len(df)):
+    grid = build_spatial_grid(version, category_col, df)
 
-# Count crimes per geo location
-location_counts = (
-    df.groupby(["lat_bin", "lon_bin"])
-      .size()
-      .reset_index(name="crime_count")
+# Geo bin precision (decimal places); switching is a lookup, not a rescan
+grid_precision = st.sidebar.select_slider(
+    "Hotspot Grid Precision (decimals)",
+    options=list(GRID_PRECISIONS),
+    value=4
 )
 
 # Find location with maximum crimes
-max_location = location_counts.loc[
-    location_counts["crime_count"].idxmax()
-]
-
-max_lat = float(max_location["lat_bin"])
-max_lon = float(max_location["lon_bin"])
-max_count = int(max_location["crime_count"])
+with run.stage("hotspot lookup"):
+    max_lat, max_lon, max_count = grid.max_cell(grid_precision)
 
 # ---------------------------
 st.markdown(
@@ -209,19 +375,8 @@ st.metric("Latitude", f"{max_lat}")
 st.metric("Longitude", f"{max_lon}")
 st.metric("Crime Count", f"{max_count}")
 
-# Filter records at max crime location
-hotspot_crimes = df[
-    (df["lat_bin"] == max_lat) &
-    (df["lon_bin"] == max_lon)
-]
-
-crime_type_counts = (
-    hotspot_crimes[category_col]
-    .value_counts()
-    .reset_index()
-)
-
-crime_type_counts.columns = ["Crime Type", "Count"]
+# Crime types at max crime location (index lookup)
+crime_type_counts = grid.cell_crime_types(max_lat, max_lon, grid_precision)
 
 top_crime_type = crime_type_counts.iloc[0]["Crime Type"]
 top_crime_count = int(crime_type_counts.iloc[0]["Count"])
@@ -236,38 +391,124 @@ st.metric("Occurrences", f"{top_crime_count}")
 
 st.dataframe(
     crime_type_counts,
-    use_container_width=True
+    width="stretch"
+)
+
+# ---------------------------
+# Top Hotspots (density peaks)
+# ---------------------------
+st.markdown(
+    f"<h3 style='color:#ff4b4b;'>🔥 Top {len(top_hotspots)} Hotspots "
+    f"({hotspot_radius} m radius)</h3>",
+    unsafe_allow_html=True
+)
+
+st.dataframe(
+    top_hotspots.rename(columns={
+        "latitude": "Latitude", "longitude": "Longitude", "radius_m": "Radius (m)",
+        "crime_count": "Crime Count", "top_crime_type": "Top Crime Type",
+    }),
+    width="stretch"
 )
 
+if len(top_hotspots):
+    selected_hotspot = st.selectbox("Crime mix of hotspot", list(top_hotspots.index))
+    st.bar_chart(hotspots.crime_mix(selected_hotspot).rename("Count"))
+
 # ---------------------------
 # POLICE PATROL RECOMMENDATION
 # ---------------------------
 
 st.subheader("🚓 Hotspot Policing Recommendation")
 
-st.warning(
-    f"""
-    ⚠️ **High Crime Hotspot Identified**
+if has_dates:
+    # Every cell × hour block scored at once from counts precomputed per
+    # dataset version; budget, recency and severity only re-rank them
+    @st.cache_resource(max_entries=4, show_spinner="Counting incidents per patrol window...")
+    def build_patrol_model(version, category_col, _rows):
+        return load_or_compute(
+            "patrol_model", version,
+            lambda: pipeline.build_patrol_model(timed_incidents(_rows), category_col)
+        )
+
+    with run.stage("patrol scoring", rows=len(df)):
+        patrol_model = build_patrol_model(version, category_col, rows)
+
+    budget_col, k_col, recency_col = st.columns(3)
+    patrol_units = budget_col.number_input(
+        "Patrol units available", min_value=1, max_value=500, value=PATROL_UNITS
+    )
+    n_recommendations = k_col.slider(
+        "Recommendations", min_value=1, max_value=50, value=TOP_RECOMMENDATIONS
+    )
+    recency = recency_col.slider(
+        "Recency emphasis", min_value=0.0, max_value=1.0, value=0.5, step=0.1
+    )
 
-    📍 **Location Coordinates**
-    - Latitude: **{max_lat}**
-    - Longitude: **{max_lon}**
-    - Total Crimes Reported: **{max_count}**
+    with st.expander("⚖️ Crime type severity weights"):
+        severity = st.data_editor(
+            patrol_model.severity_weights().to_frame(),
+            disabled=["Crime Type"],
+            width="stretch"
+        )["Severity"]
 
-    🔴 **Dominant Crime Type**
-    - **{top_crime_type}**  
-    - Occurrences: **{top_crime_count}**
+    recommendations = patrol_model.recommend(
+        n_recommendations, patrol_units, severity.to_dict(), recency
+    )
+    st.dataframe(recommendations, width="stretch")
 
-    🛑 **Recommended Police Action**
-    - Declare this area as a **Crime Hotspot**
-    - Increase **police patrol frequency**
-    - Deploy **foot patrols and mobile patrol units**
-    - Schedule patrols during **high-risk time periods**
-    - Focus enforcement on **{top_crime_type} related offenses**
+if has_dates and len(recommendations):
+    best = recommendations.iloc[0]
+    st.warning(
+        f"""
+        ⚠️ **Highest-Priority Patrol Window**
 
-    📌 **This recommendation is based on spatial crime density analysis and crime frequency patterns.**
-    """
-)
+        📍 **Location Coordinates** (~110 m cell)
+        - Latitude: **{best["Latitude"]}**
+        - Longitude: **{best["Longitude"]}**
+        - Crimes Reported in Window: **{best["Incidents"]}**
+
+        🕒 **Time Window**
+        - **{best["Time Window"]}**
+
+        🔴 **Dominant Crime Type**
+        - **{best["Dominant Crime Type"]}**
+
+        🛑 **Recommended Police Action**
+        - Assign **{best["Patrol Units"]} of {patrol_units}** patrol units to this cell during **{best["Time Window"]}**
+        - Deploy **foot patrols and mobile patrol units**
+        - Focus enforcement on **{best["Dominant Crime Type"]} related offenses**
+
+        📌 **Ranked over every cell × {HOUR_BLOCK}-hour window by incident count, recency
+        (half-life {RECENCY_HALF_LIFE_DAYS} days) and crime-type severity.**
+        """
+    )
+else:
+    st.warning(
+        f"""
+        ⚠️ **High Crime Hotspot Identified**
+
+        📍 **Location Coordinates**
+        - Latitude: **{max_lat}**
+        - Longitude: **{max_lon}**
+        - Total Crimes Reported: **{max_count}**
+
+        🔴 **Dominant Crime Type**
+        - **{top_crime_type}**  
+        - Occurrences: **{top_crime_count}**
+
+        🛑 **Recommended Police Action**
+        - Declare this area as a **Crime Hotspot**
+        - Increase **police patrol frequency**
+        - Deploy **foot patrols and mobile patrol units**
+        - Schedule patrols during **high-risk time periods**
+        - Focus enforcement on **{top_crime_type} related offenses**
+
+        📌 **This recommendation is based on spatial crime density analysis and crime frequency patterns.**
+        """
+    )
+
+run.show_panel()
 
 
 
@@ -1,106 +1,120 @@
 import streamlit as st
 import pandas as pd
 
-import base64
 #import streamlit as st
 
-def set_crime_pattern_background(image_path):
-    with open(image_path, "rb") as img:
-        encoded = base64.b64encode(img.read()).decode()
-
-    st.markdown(
-        f"""
-        <style>
-        /* App background */
-        .stApp {{
-            background-image: url("data:image/jpg;base64,{encoded}");
-            background-size: cover;
-            background-position: center;
-            background-repeat: no-repeat;
-            background-attachment: fixed;
-        }}
-
+from analytics import pipeline
+from analytics.artifacts import load_or_compute
+from analytics.data import dataset_version, load_crimes
+from analytics.filters import filtered_rows, take_rows
+from analytics.instrument import PageRun
+from analytics.theme import apply_background
+
+def set_crime_pattern_background(image_name):
+    # Cached static background (resized per viewport), not a data URI
+    apply_background(
+        image_name,
+        """
         /* Content overlay */
-        .block-container {{
+        .block-container {
             background-color: rgba(2, 6, 23, 0.75); /* dark navy */
             padding: 2rem;
             border-radius: 14px;
-        }}
+        }
 
         /* All text white */
-        h1, h2, h3, h4, h5, h6, p, span, label {{
+        h1, h2, h3, h4, h5, h6, p, span, label {
             color: white !important;
-        }}
+        }
 
         /* Metrics */
-        div[data-testid="metric-container"] {{
+        div[data-testid="metric-container"] {
             background-color: rgba(0, 0, 0, 0.55);
             border-radius: 10px;
             padding: 12px;
-        }}
+        }
 
-        div[data-testid="metric-container"] * {{
+        div[data-testid="metric-container"] * {
             color: white !important;
-        }}
+        }
 
         /* Charts background */
-        canvas {{
+        canvas {
             background-color: white !important;
             border-radius: 10px;
-        }}
+        }
 
         /* Sidebar */
-        section[data-testid="stSidebar"] {{
+        section[data-testid="stSidebar"] {
             background-color: #020617;
-        }}
+        }
 
-        section[data-testid="stSidebar"] * {{
+        section[data-testid="stSidebar"] * {
             color: white !important;
-        }}
-        </style>
-        """,
-        unsafe_allow_html=True
+        }
+        """
     )
 
 st.set_page_config(layout="wide")
 
 set_crime_pattern_background(
-    "/mount/src/crime_analysis/Assets/temp-patrol.jpg"
+    "temp-patrol.jpg"
 )
 
 #st.title("⏱ Crime Pattern & Temporal Analysis")
 
 st.title("⏱ Temporal Crime Patterns")
 
-df = pd.read_csv("/mount/src/crime_analysis/Data/Crimes_Record_No_Outliers.csv")
+run = PageRun("Temporal Analysis")
+
+# `date` is parsed to datetime64 once, at load time
+with run.stage("data load") as stage:
+    df = load_crimes(columns=pipeline.TEMPORAL_COLUMNS)
+    stage["rows"] = len(df)
 
+# Shared filters; a filtered view gets its own cube, cached per selection
+with run.stage("filter"):
+    rows, version = filtered_rows(dataset_version())
+df = take_rows(df, rows)
 
-df["date"] = pd.to_datetime(df["date"])
+# ---------------------------
+# Temporal Count Cube
+# ---------------------------
+# hour × weekday × month × crime type × district counts, built once per
+# dataset version (or precomputed); every chart below is a sum over this cube
+@st.cache_resource(max_entries=2, show_spinner="Building temporal counts...")
+def build_temporal_cube(version, _df):
+    return load_or_compute(
+        "temporal_cube", version,
+        lambda: pipeline.build_temporal_cube(_df)
+    )
+
+with run.stage("temporal cube", rows=len(df)):
+    cube = build_temporal_cube(version, df)
+
+with run.stage("temporal groupbys"):
+    hourly = cube.counts_by("hour")
+    daily = cube.counts_by("weekday")
 
 st.subheader("Crimes by hour")
-hourly = df.groupby("hour").size()
 st.line_chart(hourly)
 
 st.subheader("Crimes by Day")
-daily = df.groupby(df["date"].dt.day_name()).size()
 st.bar_chart(daily)
 
 import streamlit as st
 import pandas as pd
 import altair as alt
 
-# Ensure Date column is datetime
-df["date"] = pd.to_datetime(df["date"], errors="coerce")
-
 # ---------------------------
 # Crimes by Day
 # ---------------------------
 st.subheader("📊 Crimes by Day of Week")
 
 daily = (
-    df.groupby(df["date"].dt.day_name())
-      .size()
-      .reset_index(name="crime_count")
+    cube.counts_by("weekday")
+        .rename_axis("date")
+        .reset_index(name="crime_count")
 )
 
 # Order days correctly
@@ -152,6 +166,8 @@ st.error(
     f"🚨 Highest crime occurs on **{max_day}** with **{max_count} incidents**"
 )
 
+run.show_panel()
+
 
 
 
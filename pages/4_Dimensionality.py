@@ -1,6 +1,16 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
+
+from analytics import pipeline
+from analytics.artifacts import cached_artifact, load_artifact, load_or_compute
+from analytics.data import dataset_version, load_crimes
+from analytics.embedding import umap_available, umap_embedding
+from analytics.export import EXPORT_FORMATS, export_frame
+from analytics.filters import filtered_rows, take_rows
+from analytics.instrument import PageRun
+from analytics.manifest import load_manifest
+from analytics.sampling import stratified_sample_index
+from analytics.sweep import ClusterSweep
 
 # ---------------------------
 # Page Setup
@@ -8,24 +18,38 @@ import numpy as np
 st.set_page_config(layout="wide")
 st.title("📊 PCA + KMeans Crime Clustering (No sklearn) + Crime Type Analysis")
 
+run = PageRun("Dimensionality")
+
 # ---------------------------
 # Load Data
 # ---------------------------
-df = pd.read_csv("Data/Crimes_Record_No_Outliers.csv")
+with run.stage("data load") as stage:
+    df = load_crimes()
+    stage["rows"] = len(df)
+
+# Column roles (clustering features, crime type) from the dataset manifest
+with run.stage("manifest"):
+    roles = load_manifest()["roles"]
+
+# Shared filters (analytics.filters) select the clustering input
+with run.stage("filter"):
+    rows, version = filtered_rows(dataset_version())
+df = take_rows(df, rows)
+
 st.write("Dataset shape:", df.shape)
 st.dataframe(df.head())
 
 # ---------------------------
 # Select Numeric Features
 # ---------------------------
-X = df.select_dtypes(include="number")
+# Numeric columns other than IDs and coordinates (resolved at ingestion)
+with run.stage("feature matrix", rows=len(df)):
+    X = pipeline.feature_matrix(df, roles["features"])
 
 if X.shape[1] < 2:
     st.error("❌ Not enough numeric features for PCA")
     st.stop()
 
-X = X.values
-
 # ---------------------------
 # Sidebar Controls
 # ---------------------------
@@ -45,46 +69,114 @@ n_clusters = st.sidebar.slider(
     value=4
 )
 
-# ---------------------------
-# Standard Scaling (Manual)
-# ---------------------------
-mean = X.mean(axis=0)
-std = X.std(axis=0)
-X_scaled = (X - mean) / std
-
-# ---------------------------
-# PCA using SVD (No sklearn)
-# ---------------------------
-U, S, Vt = np.linalg.svd(X_scaled, full_matrices=False)
-X_pca = np.dot(X_scaled, Vt.T[:, :n_components])
+# KMeans runs on the PCA projection or on a UMAP embedding (umap-learn)
+embedding_method = st.sidebar.radio(
+    "Cluster On",
+    ["PCA", "UMAP"] if umap_available() else ["PCA"],
+    horizontal=True
+)
+if not umap_available():
+    st.sidebar.caption("Install umap-learn to enable the UMAP embedding.")
 
-explained_variance_ratio = (S**2) / np.sum(S**2)
-explained_variance_ratio = explained_variance_ratio[:n_components]
+if embedding_method == "UMAP":
+    n_neighbors = st.sidebar.slider("UMAP Neighbors", min_value=5, max_value=50, value=15)
+    min_dist = st.sidebar.select_slider(
+        "UMAP Min Distance", options=[0.0, 0.05, 0.1, 0.25, 0.5, 0.8], value=0.1
+    )
+    pca_init = st.sidebar.checkbox("Initialize UMAP from PCA", value=True)
 
 # ---------------------------
-# Simple KMeans (Manual)
+# Standard Scaling + PCA (No sklearn)
 # ---------------------------
-def kmeans(X, k, max_iters=100):
-    np.random.seed(42)
-    centroids = X[np.random.choice(len(X), k, replace=False)]
-
-    for _ in range(max_iters):
-        distances = np.linalg.norm(X[:, None] - centroids, axis=2)
-        labels = np.argmin(distances, axis=1)
+# Every component is fitted once per dataset version (chunked, no full SVD);
+# the slider only changes how many stored components we project onto. A stored
+# basis fitted on other feature columns is stale and refitted here
+@st.cache_resource(max_entries=2, show_spinner="Fitting PCA basis...")
+def fit_pca_basis(version, features, _X):
+    return load_or_compute(
+        "pca_basis", version,
+        lambda: pipeline.build_pca_basis(_X, features),
+        valid=lambda basis: pipeline.fitted_on(basis.columns, features)
+    )
 
-        new_centroids = np.array([
-            X[labels == i].mean(axis=0) if np.any(labels == i) else centroids[i]
-            for i in range(k)
-        ])
+features = tuple(roles["features"])
+with run.stage("SVD", rows=len(X)):
+    basis = fit_pca_basis(version, features, X)
+    X_pca = pipeline.pca_projection(X, basis, n_components)
 
-        if np.allclose(centroids, new_centroids):
-            break
+explained_variance_ratio = basis.explained_variance_ratio[:n_components]
 
-        centroids = new_centroids
+# ---------------------------
+# UMAP Embedding (optional)
+# ---------------------------
+# Fitted on a subsample stratified by crime type, the other rows placed by a
+# batched transform. Stored on disk per dataset version + parameters for the
+# unfiltered data only; filtered views are kept in memory
+@st.cache_resource(max_entries=2, show_spinner="Fitting UMAP on a subsample...")
+def get_umap_embedding(version, persist, n_components, n_neighbors, min_dist, pca_init,
+                       _X, _basis, _strata):
+    def compute():
+        return umap_embedding(
+            _X, _basis, n_components, n_neighbors, min_dist,
+            strata=_strata, pca_init=pca_init
+        )
+
+    if not persist:
+        return compute()
+    return cached_artifact(
+        pipeline.umap_artifact(n_components, n_neighbors, min_dist, pca_init), version,
+        compute
+    )
 
-    return labels, centroids
+if embedding_method == "UMAP":
+    embedding_key = ("UMAP", n_components, n_neighbors, min_dist, pca_init)
+    with run.stage("UMAP", rows=len(X)):
+        X_embed = get_umap_embedding(
+            version, rows is None, n_components, n_neighbors, min_dist, pca_init,
+            X, basis, df.get(roles["category"])
+        )
+else:
+    embedding_key = ("PCA", n_components)
+    X_embed = X_pca
 
-labels, centroids = kmeans(X_pca, n_clusters)
+# ---------------------------
+# KMeans (Manual, chunked)
+# ---------------------------
+# Same labels as the original loop on small data; mini-batch + k-means++ on
+# large data, using every core for the distance passes
+KMEANS_SEED = 42
+CLUSTER_CACHE_SIZE = 16
+
+# Precomputed clusters (PCA only, fitted on the same feature columns), or None
+@st.cache_resource(max_entries=CLUSTER_CACHE_SIZE)
+def stored_clusters(version, embedding_key, n_clusters, features):
+    if embedding_key[0] != "PCA":
+        return None
+    stored = load_artifact(pipeline.clusters_artifact(embedding_key[1], n_clusters), version)
+    if stored is None or not pipeline.fitted_on(stored[2].columns, features):
+        return None
+    return stored[0], stored[1]
+
+# Without them, every k in SWEEP_KS is fitted once per (dataset, embedding) on
+# the shared sweep pool; the page never waits for it. An evicted sweep is
+# cancelled so its queued fits don't hold up the current one
+@st.cache_resource(max_entries=2, on_release=ClusterSweep.cancel)
+def cluster_sweep(version, embedding_key, seed, _X_embed):
+    return ClusterSweep(_X_embed, seed=seed)
+
+# LRU of recent settings: the sweep's centroids when that k is done, else
+# fitted right away
+@st.cache_resource(max_entries=CLUSTER_CACHE_SIZE, show_spinner="Running KMeans...")
+def get_clusters(version, embedding_key, n_clusters, seed, _X_embed, _sweep):
+    return _sweep.clusters(n_clusters) or pipeline.cluster_labels(_X_embed, n_clusters, seed=seed)
+
+with run.stage("KMeans", rows=len(X_embed)):
+    clusters = stored_clusters(version, embedding_key, n_clusters, features)
+    precomputed = clusters is not None
+    sweep = None if precomputed else cluster_sweep(version, embedding_key, KMEANS_SEED, X_embed)
+    labels, centroids = clusters or get_clusters(
+        version, embedding_key, n_clusters, KMEANS_SEED, X_embed, sweep
+    )
 
 # ---------------------------
 # Attach Cluster Labels to Data
@@ -94,18 +186,34 @@ df["Cluster"] = labels
 # ---------------------------
 # PCA Scatter Plot
 # ---------------------------
-st.subheader("📈 PCA Cluster Visualization")
+st.subheader(f"📈 {embedding_method} Cluster Visualization")
+
+# Plot at most SCATTER_PER_CLUSTER points per cluster (stratified sample)
+SCATTER_PER_CLUSTER = 5000
 
+@st.cache_data(max_entries=16)
+def scatter_sample_index(version, embedding_key, n_clusters, n_per_group, _labels):
+    return stratified_sample_index(_labels, n_per_group=n_per_group, seed=42)
+
+if len(labels) > SCATTER_PER_CLUSTER * n_clusters:
+    with run.stage("sampling", rows=len(labels)):
+        plot_index = scatter_sample_index(
+            version, embedding_key, n_clusters, SCATTER_PER_CLUSTER, labels
+        )
+else:
+    plot_index = slice(None)
+
+x_axis, y_axis = f"{embedding_method}_1", f"{embedding_method}_2"
 pca_df = pd.DataFrame({
-    "PCA_1": X_pca[:, 0],
-    "PCA_2": X_pca[:, 1],
-    "Cluster": labels.astype(str)
+    x_axis: X_embed[plot_index, 0],
+    y_axis: X_embed[plot_index, 1],
+    "Cluster": labels[plot_index].astype(str)
 })
 
 st.scatter_chart(
     pca_df,
-    x="PCA_1",
-    y="PCA_2",
+    x=x_axis,
+    y=y_axis,
     color="Cluster"
 )
 
@@ -135,6 +243,39 @@ cluster_counts = (
 
 st.dataframe(cluster_counts)
 
+# ---------------------------
+# Choosing k: Elbow & Silhouette
+# ---------------------------
+st.subheader("📉 Choosing k: Elbow & Silhouette")
+
+# Refreshes itself while the sweep is running, then reruns the page once
+sweep_running = sweep is not None and not sweep.done
+
+@st.fragment(run_every=2 if sweep_running else None)
+def sweep_charts():
+    if sweep_running and sweep.done:
+        st.rerun()
+
+    diagnostics = sweep.diagnostics()
+    if not sweep.done:
+        st.caption(
+            f"Fitting k = {sweep.ks[0]}..{sweep.ks[-1]} in the background: "
+            f"{len(diagnostics)} of {len(sweep.ks)} done"
+        )
+    if diagnostics.empty:
+        return
+
+    inertia_col, silhouette_col = st.columns(2)
+    inertia_col.write("Inertia (elbow)")
+    inertia_col.line_chart(diagnostics["Inertia"])
+    silhouette_col.write("Silhouette (sampled)")
+    silhouette_col.line_chart(diagnostics["Silhouette"])
+
+if sweep is None:
+    st.caption("Showing precomputed clusters; the k sweep runs only when clustering live.")
+else:
+    sweep_charts()
+
 # ======================================================
 # 🔎 CRIME TYPE ANALYSIS USING "Primary Type"
 # ======================================================
@@ -144,7 +285,7 @@ st.dataframe(cluster_counts)
 # ---------------------------
 st.header("🔎 Crime Type Analysis by Cluster")
 
-crime_column = "primary type"   # ✅ Correct column name
+crime_column = roles["category"]
 
 if crime_column not in df.columns:
     st.error(f"❌ Column '{crime_column}' not found in dataset.")
@@ -155,15 +296,29 @@ else:
     # ---------------------------
     st.subheader("📊 Crime Type Count in Each Cluster")
 
-    crime_cluster_table = pd.pivot_table(
-        df,
-        index="Cluster",
-        columns=crime_column,
-        aggfunc="size",
-        fill_value=0
-    )
-
-    st.dataframe(crime_cluster_table)
+    # Clusters × crime types counted once (one bincount) per clustering;
+    # every view below is a row / column slice of it. The stored table only
+    # goes with the stored clusters
+    @st.cache_resource(max_entries=CLUSTER_CACHE_SIZE)
+    def get_crime_cluster_table(version, embedding_key, n_clusters, seed, crime_column,
+                                precomputed, _df, _labels):
+        def compute():
+            return pipeline.crime_cluster_table(_df, _labels, crime_column)
+
+        if not precomputed:
+            return compute()
+        return load_or_compute(
+            pipeline.crime_cluster_table_artifact(embedding_key[1], n_clusters), version,
+            compute
+        )
+
+    with run.stage("pivot", rows=len(df)):
+        crime_cluster_table = get_crime_cluster_table(
+            version, embedding_key, n_clusters, KMEANS_SEED, crime_column, precomputed,
+            df, labels
+        )
+
+    st.dataframe(crime_cluster_table.to_frame())
 
     # ---------------------------
     # 2. Interactive Crime Type Distribution per Cluster
@@ -172,12 +327,11 @@ else:
 
     selected_cluster = st.selectbox(
         "Select Cluster",
-        options=sorted(df["Cluster"].unique())
+        options=list(crime_cluster_table.row_labels)
     )
 
-    cluster_data = df[df["Cluster"] == selected_cluster]
-
-    crime_counts = cluster_data[crime_column].value_counts()
+    # Row lookup in the table, not a filter + rescan of the data
+    crime_counts = crime_cluster_table.row(selected_cluster)
 
     st.write(f"Crime type distribution in Cluster {selected_cluster}")
     st.dataframe(crime_counts.rename("Crime Count"))
@@ -190,8 +344,7 @@ else:
     st.subheader("📋 Number of Different Crime Types in Each Cluster")
 
     crime_type_counts = (
-        df.groupby("Cluster")[crime_column]
-        .nunique()
+        crime_cluster_table.distinct_per_row()
         .rename("Number of Crime Types")
     )
 
@@ -203,12 +356,36 @@ else:
 # ---------------------------
 st.subheader("⬇️ Download Clustered Crime Dataset")
 
-csv = df.to_csv(index=False).encode("utf-8")
+export_format = st.selectbox("File format", list(EXPORT_FORMATS))
+export_columns = st.multiselect("Columns", list(df.columns), default=list(df.columns))
+export_clusters = st.multiselect(
+    "Clusters", sorted(df["Cluster"].unique()), default=sorted(df["Cluster"].unique())
+)
 
+# Written only when the button is clicked (in chunks, compressed) and kept
+# on disk per dataset version + filters + clustering settings + selections
+def render_export():
+    # Runs after the panel is drawn, so it only reaches the metrics file
+    with run.stage("export", rows=len(df)):
+        path = export_frame(
+            df, dataset_version(), export_format,
+            columns=export_columns,
+            rows=df["Cluster"].isin(export_clusters).to_numpy(),
+            params=(version, embedding_key, n_clusters, KMEANS_SEED,
+                    tuple(export_columns), tuple(sorted(export_clusters))),
+        )
+        # Handed over as a file for Streamlit to read, not copied here first
+        return path.open("rb")
+
+suffix, mime, _ = EXPORT_FORMATS[export_format]
 st.download_button(
     label="Download Clustered Dataset",
-    data=csv,
-    file_name="crime_clusters.csv",
-    mime="text/csv"
+    data=render_export,
+    file_name=f"crime_clusters{suffix}",
+    mime=mime,
+    on_click="ignore",
+    disabled=not export_columns or not export_clusters
 )
 
+run.show_panel()
+
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from analytics.clustering import (
+    assign_labels, fit_kmeans, kmeans, minibatch_kmeans, silhouette_score, squared_distances,
+)
+
+
+def original_kmeans(X, k, max_iters=100):
+    # The clustering page's loop before the chunked engine
+    np.random.seed(42)
+    centroids = X[np.random.choice(len(X), k, replace=False)]
+
+    for _ in range(max_iters):
+        distances = np.linalg.norm(X[:, None] - centroids, axis=2)
+        labels = np.argmin(distances, axis=1)
+
+        new_centroids = np.array([
+            X[labels == i].mean(axis=0) if np.any(labels == i) else centroids[i]
+            for i in range(k)
+        ])
+
+        if np.allclose(centroids, new_centroids):
+            break
+
+        centroids = new_centroids
+
+    return labels, centroids
+
+
+@pytest.fixture
+def blobs():
+    rng = np.random.default_rng(0)
+    centres = rng.uniform(-10, 10, (5, 3))
+    return np.concatenate([rng.normal(centre, 1.0, (2_000, 3)) for centre in centres])
+
+
+def test_squared_distances_match_direct(blobs):
+    centroids = blobs[:7]
+    expected = ((blobs[:, None] - centroids) ** 2).sum(axis=2)
+    np.testing.assert_allclose(squared_distances(blobs, centroids), expected, atol=1e-9)
+
+
+@pytest.mark.parametrize("n_jobs", [1, 4])
+def test_chunked_assignment_matches_full_pass(blobs, n_jobs):
+    centroids = blobs[[0, 2_500, 5_000, 9_999]]
+    distances = ((blobs[:, None] - centroids) ** 2).sum(axis=2)
+
+    labels, inertia = assign_labels(blobs, centroids, chunk_size=1_000, n_jobs=n_jobs)
+    np.testing.assert_array_equal(labels, distances.argmin(axis=1))
+    assert inertia == pytest.approx(distances.min(axis=1).sum())
+
+
+@pytest.mark.parametrize("k", [2, 4, 7])
+def test_small_data_labels_match_original_loop(blobs, k):
+    expected_labels, expected_centroids = original_kmeans(blobs, k)
+    labels, centroids = kmeans(blobs, k, seed=42, chunk_size=1_000)
+
+    np.testing.assert_array_equal(labels, expected_labels)
+    np.testing.assert_allclose(centroids, expected_centroids)
+
+
+def test_fit_kmeans_uses_full_batch_below_threshold(blobs):
+    np.testing.assert_array_equal(fit_kmeans(blobs, 4)[0], kmeans(blobs, 4)[0])
+
+
+def test_minibatch_labels_are_nearest_centroids(blobs):
+    labels, centroids = minibatch_kmeans(blobs, 5, batch_size=512)
+    np.testing.assert_array_equal(labels, assign_labels(blobs, centroids)[0])
+    # Well separated blobs: one cluster per blob
+    assert len(np.unique(labels)) == 5
+
+
+def test_silhouette_of_separated_blobs(blobs):
+    labels = np.repeat(np.arange(5), 2_000)
+    assert silhouette_score(blobs, labels) > 0.5
+    assert silhouette_score(blobs, np.zeros(len(blobs), dtype=int)) == 0.0
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.crosstab import Crosstab
+
+
+@pytest.fixture
+def incidents():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "Cluster": rng.integers(0, 5, 3_000),
+        "primary type": rng.choice(["THEFT", "BATTERY", "ASSAULT", "ARSON", None], 3_000),
+    })
+
+
+def test_matches_pandas_crosstab(incidents):
+    table = Crosstab.from_arrays(
+        incidents["Cluster"], incidents["primary type"], "Cluster", "primary type"
+    )
+    expected = pd.crosstab(incidents["Cluster"], incidents["primary type"])
+    pd.testing.assert_frame_equal(table.to_frame(), expected, check_dtype=False)
+
+
+def test_merge_matches_full_table(incidents):
+    head, tail = incidents.iloc[:1_000], incidents.iloc[1_000:]
+    # The delta brings a cluster and a crime type the history lacks
+    tail = tail.assign(Cluster=tail["Cluster"].replace(4, 9))
+    tail.loc[tail.index[:10], "primary type"] = "HOMICIDE"
+
+    both = pd.concat([head, tail])
+    full = Crosstab.from_arrays(both["Cluster"], both["primary type"])
+    merged = Crosstab.from_arrays(head["Cluster"], head["primary type"]).merge(
+        Crosstab.from_arrays(tail["Cluster"], tail["primary type"])
+    )
+    pd.testing.assert_frame_equal(merged.to_frame(), full.to_frame())
+
+
+def test_slices(incidents):
+    table = Crosstab.from_arrays(incidents["Cluster"], incidents["primary type"])
+    expected = incidents.loc[incidents["Cluster"] == 2, "primary type"].value_counts()
+
+    row = table.row(2)
+    assert row.to_dict() == expected.to_dict()
+    assert list(row) == sorted(row, reverse=True)
+    assert table.distinct_per_row()[2] == expected.size
+    assert table.row_totals().sum() == incidents["primary type"].notna().sum()
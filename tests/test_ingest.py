@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import artifacts, pipeline, precompute
+from analytics.artifacts import list_artifacts, load_artifact
+from analytics.clustering import assign_labels
+from analytics.data import dataset_version, read_csv, read_dataset, source_path
+from analytics.ingest import append_delta, convert_to_parquet
+from bench.generate import generate_crimes
+
+HISTORY_ROWS, DELTA_ROWS = 4_000, 1_000
+
+
+def write_csv(path, df):
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture
+def artifacts_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACTS_DIR", tmp_path / "artifacts")
+    return tmp_path / "artifacts"
+
+
+@pytest.fixture
+def history(tmp_path):
+    return write_csv(tmp_path / "crimes.csv", generate_crimes(HISTORY_ROWS, seed=1))
+
+
+@pytest.fixture
+def delta(tmp_path):
+    return write_csv(
+        tmp_path / "delta.csv", generate_crimes(DELTA_ROWS, seed=2, start_id=HISTORY_ROWS)
+    )
+
+
+def precompute_history(path):
+    path = str(path)
+    version = dataset_version(path)
+    for task in (precompute.overview_task, precompute.manifest_task, precompute.map_task,
+                 precompute.frames_task, precompute.temporal_task, precompute.pca_task):
+        task(path, version)
+    precompute.cluster_task(path, version, 2, 3)
+    return version
+
+
+# ---------------------------
+# Mergeable aggregates
+# ---------------------------
+def assert_same_aggregate(name, merged, full):
+    if name == "overview_counts":
+        assert merged["rows"] == full["rows"]
+        assert merged["crime_types"].to_dict() == full["crime_types"].to_dict()
+        assert merged["locations"].count() == full["locations"].count()
+    elif name == "spatial_grid":
+        order = ["lat_bin", "lon_bin"]
+        for precision in full.levels:
+            pd.testing.assert_frame_equal(
+                merged.cell_counts(precision).sort_values(order, ignore_index=True),
+                full.cell_counts(precision).sort_values(order, ignore_index=True),
+            )
+        lat_bin, lon_bin, _ = full.max_cell()
+        pd.testing.assert_frame_equal(
+            merged.cell_crime_types(lat_bin, lon_bin).sort_values("Crime Type", ignore_index=True),
+            full.cell_crime_types(lat_bin, lon_bin).sort_values("Crime Type", ignore_index=True),
+        )
+    elif name.startswith("density_grid_"):
+        order = ["latitude", "longitude"]
+        pd.testing.assert_frame_equal(
+            merged.sort_values(order, ignore_index=True), full.sort_values(order, ignore_index=True),
+            check_dtype=False,
+        )
+    elif name.startswith("density_frames_"):
+        assert list(merged.labels) == list(full.labels)
+        for f in range(len(full.labels)):
+            pd.testing.assert_frame_equal(
+                merged.frame(f).sort_values(["latitude", "longitude"], ignore_index=True),
+                full.frame(f).sort_values(["latitude", "longitude"], ignore_index=True),
+            )
+    elif name == "patrol_model":
+        pd.testing.assert_frame_equal(merged.recommend(k=20), full.recommend(k=20))
+    elif name == "temporal_cube":
+        for axis in ("hour", "weekday", "month", "crime_type", "district"):
+            # Label dtypes follow the source frame (compact or not); the counts may not
+            pd.testing.assert_series_equal(
+                merged.counts_by(axis).sort_index(), full.counts_by(axis).sort_index(),
+                check_index_type=False,
+            )
+        assert merged.total(crime_type=["THEFT"], district=[1, 2]) \
+            == full.total(crime_type=["THEFT"], district=[1, 2])
+    elif name == "feature_stats":
+        assert merged["columns"] == full["columns"]
+        np.testing.assert_allclose(merged["stats"].mean, full["stats"].mean)
+        np.testing.assert_allclose(merged["stats"].scatter, full["stats"].scatter, rtol=1e-9)
+    elif name == "dataset_profile":
+        for column, summary in full.summary().items():
+            # The means differ only by summation order
+            assert merged.summary()[column] == pytest.approx(summary)
+    else:
+        raise AssertionError(f"no comparison for {name}")
+
+
+def test_merged_chunk_aggregates_match_full_recompute(history):
+    df = read_csv(history)
+    feature_cols = pipeline.feature_columns(df)
+    full = pipeline.chunk_aggregates(df, feature_cols)
+
+    merged = None
+    for chunk in np.array_split(np.arange(len(df)), 3):
+        partial = pipeline.chunk_aggregates(df.iloc[chunk], feature_cols)
+        merged = partial if merged is None else {
+            name: pipeline.merge_aggregate(name, merged[name], partial[name]) for name in merged
+        }
+
+    assert merged.keys() == full.keys()
+    for name in full:
+        assert_same_aggregate(name, merged[name], full[name])
+
+
+# ---------------------------
+# Append
+# ---------------------------
+def test_parquet_append_matches_full_csv(history, delta, artifacts_dir):
+    convert_to_parquet(history)
+    full = pd.concat([read_csv(history), read_csv(delta)], ignore_index=True)
+
+    append_delta(delta, history)
+    assert source_path(history).suffix == ".parquet"
+    pd.testing.assert_frame_equal(
+        read_dataset(history), read_csv(history),
+        check_dtype=False, check_categorical=False,
+    )
+    pd.testing.assert_frame_equal(
+        read_csv(history), full, check_dtype=False, check_categorical=False
+    )
+
+
+def test_append_rolls_aggregates_forward(history, delta, artifacts_dir):
+    old_version = precompute_history(history)
+    new_version, _ = append_delta(delta, history)
+    assert new_version != old_version
+
+    df = read_csv(history)
+    full = pipeline.chunk_aggregates(df, pipeline.feature_columns(df))
+    carried = set(list_artifacts(new_version))
+    assert set(full) <= carried
+    for name in full:
+        assert_same_aggregate(name, load_artifact(name, new_version), full[name])
+
+    basis = load_artifact("pca_basis", new_version)
+    refit = pipeline.build_pca_basis(pipeline.feature_matrix(df, basis.columns), basis.columns)
+    np.testing.assert_allclose(np.abs(basis.components), np.abs(refit.components), atol=1e-8)
+
+
+def test_append_extends_clusters_in_their_basis(history, delta, artifacts_dir):
+    old_version = precompute_history(history)
+    name = pipeline.clusters_artifact(2, 3)
+    old_labels, centroids, basis = load_artifact(name, old_version)
+
+    new_version, _ = append_delta(delta, history)
+    labels, new_centroids, new_basis = load_artifact(name, new_version)
+
+    # History keeps its labels; new rows join the nearest stored centroid
+    np.testing.assert_array_equal(new_centroids, centroids)
+    np.testing.assert_array_equal(new_basis.components, basis.components)
+    np.testing.assert_array_equal(labels[:HISTORY_ROWS], old_labels)
+    X_delta = pipeline.feature_matrix(read_csv(delta), basis.columns)
+    expected, _ = assign_labels(pipeline.pca_projection(X_delta, basis, 2), centroids)
+    np.testing.assert_array_equal(labels[HISTORY_ROWS:], expected)
+
+    table = load_artifact(pipeline.crime_cluster_table_artifact(2, 3), new_version)
+    expected_table = pipeline.crime_cluster_table(read_dataset(history), labels)
+    pd.testing.assert_frame_equal(table.to_frame(), expected_table.to_frame())
+
+
+def test_refit_drops_clusters(history, delta, artifacts_dir):
+    precompute_history(history)
+    new_version, _ = append_delta(delta, history, refit_clusters=True)
+
+    carried = list_artifacts(new_version)
+    assert "pca_basis" in carried
+    assert not [name for name in carried if name.startswith(("clusters_", "crime_cluster_"))]
+
+
+def test_new_feature_set_drops_feature_artifacts(history, tmp_path, artifacts_dir):
+    precompute_history(history)
+    extra = generate_crimes(DELTA_ROWS, seed=2, start_id=HISTORY_ROWS).assign(score=1.5)
+    new_version, _ = append_delta(write_csv(tmp_path / "delta.csv", extra), history)
+
+    carried = list_artifacts(new_version)
+    assert "temporal_cube" in carried
+    for name in ("feature_stats", "pca_basis", pipeline.clusters_artifact(2, 3)):
+        assert name not in carried
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from analytics.reduction import (
+    RANDOMIZED_MIN_FEATURES, accumulate_stats, fit_pca, iter_chunks, merge_stats,
+    moment_stats, pca_from_stats, project, randomized_pca,
+)
+
+
+@pytest.fixture
+def correlated():
+    rng = np.random.default_rng(1)
+    latent = rng.normal(size=(5_000, 3))
+    mixing = rng.normal(size=(3, 8))
+    return latent @ mixing + rng.normal(scale=0.1, size=(5_000, 8)) + rng.uniform(-5, 5, 8)
+
+
+def full_svd_pca(X):
+    # The page's original fit: standardize, then a full SVD
+    X_scaled = (X - X.mean(axis=0)) / X.std(axis=0)
+    _, S, Vt = np.linalg.svd(X_scaled, full_matrices=False)
+    return X_scaled, S**2 / (S**2).sum(), Vt
+
+
+def test_merged_moments_match_full_pass(correlated):
+    merged = accumulate_stats(iter_chunks(correlated, chunk_size=777))
+    full = moment_stats(correlated)
+
+    assert merged.n_rows == full.n_rows
+    np.testing.assert_allclose(merged.mean, full.mean)
+    np.testing.assert_allclose(merged.scatter, full.scatter, rtol=1e-9)
+
+
+def test_merge_order_does_not_matter(correlated):
+    a, b = moment_stats(correlated[:1_000]), moment_stats(correlated[1_000:])
+    np.testing.assert_allclose(merge_stats(a, b).scatter, merge_stats(b, a).scatter)
+    assert merge_stats(None, a) is a
+
+
+def test_incremental_pca_matches_full_svd(correlated):
+    X_scaled, ratio, Vt = full_svd_pca(correlated)
+    basis = fit_pca(correlated, chunk_size=1_000)
+
+    np.testing.assert_allclose(basis.explained_variance_ratio, ratio, atol=1e-10)
+    # Components agree up to sign (the basis fixes its own orientation)
+    np.testing.assert_allclose(np.abs(basis.components[:3]), np.abs(Vt[:3]), atol=1e-8)
+    np.testing.assert_allclose(
+        np.abs(project(correlated, basis, 3, chunk_size=999)), np.abs(X_scaled @ Vt[:3].T),
+        atol=1e-8,
+    )
+
+
+def test_pca_from_merged_stats_matches_single_fit(correlated):
+    stats = merge_stats(moment_stats(correlated[:2_000]), moment_stats(correlated[2_000:]))
+    merged, single = pca_from_stats(stats), fit_pca(correlated)
+    np.testing.assert_allclose(merged.components, single.components, atol=1e-10)
+
+
+def test_randomized_pca_matches_full_svd_on_wide_data():
+    rng = np.random.default_rng(2)
+    n_features = RANDOMIZED_MIN_FEATURES + 20
+    X = rng.normal(size=(2_000, 4)) @ rng.normal(size=(4, n_features)) \
+        + rng.normal(scale=0.05, size=(2_000, n_features))
+    _, ratio, Vt = full_svd_pca(X)
+
+    basis = fit_pca(X, n_components=4)
+    assert basis.components.shape == (4, n_features)
+    np.testing.assert_allclose(basis.explained_variance_ratio, ratio[:4], rtol=1e-6)
+    np.testing.assert_allclose(np.abs(basis.components), np.abs(Vt[:4]), atol=1e-6)
+    # "auto" picked the randomized fit for the wide matrix
+    np.testing.assert_array_equal(basis.components, randomized_pca(X, 4).components)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.sketch import DistinctCounter
+
+
+def chunked_counter(values, n_chunks, **kwargs):
+    counters = [
+        DistinctCounter.from_values(chunk, **kwargs) for chunk in np.array_split(values, n_chunks)
+    ]
+    merged = counters[0]
+    for counter in counters[1:]:
+        merged = merged.merge(counter)
+    return merged
+
+
+def test_exact_while_small():
+    values = pd.Series(["a", "b", None, "a", "c"])
+    counter = DistinctCounter.from_values(values)
+    assert counter.is_exact and counter.relative_error == 0.0
+    assert counter.count() == 3
+
+
+def test_merged_exact_counts_match_full_count():
+    values = np.random.default_rng(0).integers(0, 5_000, 40_000)
+    assert chunked_counter(values, 7).count() == len(np.unique(values))
+
+
+def test_int_and_float_chunks_hash_alike():
+    ints = DistinctCounter.from_values(pd.Series([1, 2, 3]))
+    floats = DistinctCounter.from_values(pd.Series([1.0, 2.0, np.nan]))
+    assert ints.merge(floats).count() == 3
+
+
+@pytest.mark.parametrize("error", [0.01, 0.02])
+def test_hyperloglog_within_error_bound(error):
+    values = np.arange(300_000)
+    counter = DistinctCounter.from_values(values, error=error, exact_limit=1_000)
+    assert not counter.is_exact
+    # Three standard errors
+    assert counter.count() == pytest.approx(len(values), rel=3 * counter.relative_error)
+
+
+def test_merged_sketches_match_full_sketch():
+    values = np.random.default_rng(1).integers(0, 10**9, 200_000)
+    full = DistinctCounter.from_values(values, exact_limit=1_000)
+    merged = chunked_counter(values, 5, exact_limit=1_000)
+
+    np.testing.assert_array_equal(merged.registers, full.registers)
+    assert merged.count() == full.count()
+
+
+def test_exact_merges_into_sketch():
+    sketched = DistinctCounter.from_values(np.arange(5_000), exact_limit=1_000)
+    exact = DistinctCounter.from_values(np.arange(4_000, 4_500), exact_limit=1_000)
+    full = DistinctCounter.from_values(np.arange(5_000), exact_limit=1_000)
+
+    np.testing.assert_array_equal(sketched.merge(exact).registers, full.registers)
+    np.testing.assert_array_equal(exact.merge(sketched).registers, full.registers)
+
+
+def test_merge_rejects_other_precision():
+    with pytest.raises(ValueError):
+        DistinctCounter(error=0.01).merge(DistinctCounter(error=0.02))